@@ -0,0 +1,183 @@
+"""
+Tracking Evaluation Engine
+시간 정렬, 지연 추정, 정확도/부드러움 지표를 모든 방법/관절에 대해 한 번에 계산하는 모듈
+"""
+
+import numpy as np
+
+# 기본 지연 탐색 범위 (초)
+MAX_LAG_SECONDS = 1.0
+
+def interpolation_weights(times, source_times):
+    """times 시각을 source_times 구간으로 보간하기 위한 (하위 인덱스, 가중치, 유효 마스크)"""
+    times = np.asarray(times, dtype=float)
+    source_times = np.asarray(source_times, dtype=float)
+    upper = np.clip(np.searchsorted(source_times, times, side='left'), 1, len(source_times) - 1)
+    lower = upper - 1
+    span = source_times[upper] - source_times[lower]
+    weight = np.where(span > 0, (times - source_times[lower]) / np.where(span > 0, span, 1), 0.0)
+    valid = (times >= source_times[0]) & (times <= source_times[-1])
+    return lower, weight, valid
+
+def align_stream(times, source_times, values):
+    """source_times 에서 샘플링된 values (N, ...)를 times 시각으로 선형 보간
+
+    반환값: (정렬된 값 (T, ...), 유효 마스크 (T,)) - 원본 시간 범위 밖은 무효
+    """
+    values = np.asarray(values)
+    lower, weight, valid = interpolation_weights(times, source_times)
+    weight = weight.reshape((-1,) + (1,) * (values.ndim - 1))
+    return values[lower] * (1 - weight) + values[lower + 1] * weight, valid
+
+def lagged_products(reference, output, max_lag):
+    """지연 k = -max_lag..max_lag 에 대한 sum_t reference[t] * output[t + k] (지연마다 내적)
+
+    reference, output: (T, ...) 배열. 반환값: (2 * max_lag + 1, ...) 배열.
+    """
+    T = len(reference)
+    products = np.empty((2 * max_lag + 1,) + reference.shape[1:])
+    for i, k in enumerate(range(-max_lag, max_lag + 1)):
+        if k >= 0:
+            products[i] = np.einsum('t...,t...->...', reference[:T - k], output[k:])
+        else:
+            products[i] = np.einsum('t...,t...->...', reference[-k:], output[:T + k])
+    return products
+
+def normalized_correlation(reference, output, weights, max_lag, method='auto'):
+    """겹치는 구간 에너지로 정규화한 지연별 교차상관 (2 * max_lag + 1, ...)
+
+    reference, output: 평균 제거 후 무효 샘플을 0으로 둔 신호, weights: 유효 마스크 (0/1)
+    """
+    T = len(reference)
+    if method == 'auto':
+        method = 'fft' if 2 * max_lag + 1 > 4 * np.log2(max(T, 2)) else 'sliding'
+
+    if method == 'fft':
+        # 각 신호의 스펙트럼을 한 번만 계산해 세 상관을 구함
+        n_fft = 1 << int(np.ceil(np.log2(T + max_lag)))
+        spectra = [np.fft.rfft(x, n_fft, axis=0) for x in (reference, output, reference**2, output**2, weights)]
+        reference_f, output_f, reference_sq_f, output_sq_f, weights_f = spectra
+
+        def lagged(a, b):
+            correlation = np.fft.irfft(np.conj(a) * b, n_fft, axis=0)
+            return np.concatenate((correlation[n_fft - max_lag:], correlation[:max_lag + 1]), axis=0)
+
+        products = lagged(reference_f, output_f)
+        reference_energy = lagged(reference_sq_f, weights_f)
+        output_energy = lagged(weights_f, output_sq_f)
+    else:
+        products = lagged_products(reference, output, max_lag)
+        reference_energy = lagged_products(reference**2, weights, max_lag)
+        output_energy = lagged_products(weights, output**2, max_lag)
+
+    norm = np.sqrt(np.maximum(reference_energy * output_energy, 0))
+    return np.where(norm > 0, products / np.where(norm > 0, norm, 1), -np.inf)
+
+def parabolic_peak(values, axis=0):
+    """이산 최대값 위치와 양옆 값으로 포물선 보간한 최대값 위치 (연속 인덱스)"""
+    values = np.moveaxis(values, axis, 0)
+    peak = np.argmax(values, axis=0)
+    # 양옆 값이 있는 내부 위치가 없으면 보간 불가
+    if len(values) < 3:
+        return peak.astype(float)
+    inner = (peak > 0) & (peak < len(values) - 1)
+    index = np.clip(peak, 1, len(values) - 2)
+
+    left = np.take_along_axis(values, (index - 1)[None], axis=0)[0]
+    center = np.take_along_axis(values, index[None], axis=0)[0]
+    right = np.take_along_axis(values, (index + 1)[None], axis=0)[0]
+    with np.errstate(invalid='ignore'):
+        curvature = left - 2 * center + right
+        # 양옆 값이 유효하고 위로 볼록할 때만 보간
+        usable = inner & np.isfinite(curvature) & (curvature < 0)
+        offset = np.where(usable, 0.5 * (left - right) / np.where(usable, curvature, -1), 0.0)
+    return peak + offset
+
+def shift_stream(values, valid, lag):
+    """values (T, ...)를 채널별 지연 lag (...) 샘플만큼 앞당겨 읽기: values[t + lag] (선형 보간)"""
+    T = len(values)
+    position = np.arange(T).reshape((T,) + (1,) * (values.ndim - 1)) + lag
+    lower = np.floor(position).astype(np.int64)
+    weight = position - lower
+    inside = (lower >= 0) & (lower < T - 1) | ((lower == T - 1) & (weight == 0))
+    # 정수 위치 (weight == 0)는 그 샘플만 읽음 (마지막 샘플 포함)
+    lower = np.clip(lower, 0, T - 1)
+    upper = np.where(weight > 0, np.minimum(lower + 1, T - 1), lower)
+
+    shifted = (np.take_along_axis(values, lower, axis=0) * (1 - weight)
+               + np.take_along_axis(values, upper, axis=0) * weight)
+    valid = np.broadcast_to(valid, values.shape)
+    shifted_valid = (inside & np.take_along_axis(valid, lower, axis=0)
+                     & np.take_along_axis(valid, upper, axis=0))
+    return shifted, shifted_valid
+
+def evaluate_tracking(times, reference, outputs, output_times=None, valid=None, max_lag=None,
+                      lag_method='auto'):
+    """모든 방법/채널의 추종 지표를 한 번에 계산
+
+    times: 기준 시각 (T,), reference: 기준 신호 (T, ...)
+    outputs: 방법별 출력 (T, M, ...) - output_times (T,)가 주어지면 times로 보간해 정렬
+    valid: 방법별 유효 샘플 마스크 (T, M) (예: 워밍업 중 무효)
+    max_lag: 지연 탐색 범위 (샘플, 기본 T // 4와 MAX_LAG_SECONDS 중 작은 값)
+
+    반환값 (모두 (M, ...) 배열):
+        rmse: 오차 RMS, rmse_aligned: 추정 지연 보정 후 오차 RMS,
+        lag: 출력의 지연 (s, 양수 = 출력이 늦음), jerk: 평균 |2차 차분|, samples: 유효 샘플 수
+        계산에 쓸 유효 샘플이 없는 항목 (워밍업 중인 방법 등)은 NaN
+    """
+    times = np.asarray(times, dtype=float)
+    reference = np.asarray(reference, dtype=np.float64)
+    outputs = np.asarray(outputs, dtype=np.float64)
+    T, M = outputs.shape[:2]
+    dt = (times[-1] - times[0]) / (T - 1) if T > 1 else 1.0
+
+    mask = np.ones((T, M), dtype=bool) if valid is None else np.asarray(valid, dtype=bool)
+    if output_times is not None:
+        lower, weight, _ = interpolation_weights(times, output_times)
+        outputs, in_range = align_stream(times, output_times, outputs)
+        # 보간에 쓰인 양끝 샘플이 모두 유효해야 함
+        mask = (mask[lower] | (weight[:, None] == 1)) & (mask[lower + 1] | (weight[:, None] == 0)) & in_range[:, None]
+    mask = np.broadcast_to(mask.reshape((T, M) + (1,) * (outputs.ndim - 2)), outputs.shape)
+    reference = np.broadcast_to(reference[:, None], outputs.shape)
+
+    samples = mask.sum(axis=0)
+    count = np.maximum(samples, 1)
+
+    # 정확도: 유효 샘플만 사용
+    error = np.where(mask, outputs - reference, 0.0)
+    rmse = np.where(samples > 0, np.sqrt(np.sum(error**2, axis=0) / count), np.nan)
+
+    # 지연: 평균 제거 후 제한된 지연 범위의 정규화 교차상관 최대값
+    if max_lag is None:
+        max_lag = min(T // 4, int(np.ceil(MAX_LAG_SECONDS / dt)))
+    max_lag = int(min(max_lag, max(T - 2, 0)))
+    centered_reference = np.where(mask, reference - np.sum(reference * mask, axis=0) / count, 0.0)
+    centered_output = np.where(mask, outputs - np.sum(outputs * mask, axis=0) / count, 0.0)
+    # 지연마다 겹치는 구간의 에너지로 정규화 (창 가장자리에 의한 0 지연 편향 제거)
+    correlation = normalized_correlation(centered_reference, centered_output, mask.astype(float),
+                                         max_lag, lag_method)
+    # 유한한 상관이 하나도 없으면 (유효 샘플 없음, 에너지 0) 지연 추정 불가
+    has_lag = np.any(np.isfinite(correlation), axis=0)
+    lag_samples = np.where(has_lag, parabolic_peak(correlation) - max_lag, np.nan)
+
+    # 지연 보정 후 정확도 (지연 추정 불가 채널은 보정 없이)
+    shifted, shifted_valid = shift_stream(outputs, mask, np.where(has_lag, lag_samples, 0.0))
+    aligned_mask = shifted_valid & mask
+    aligned_samples = aligned_mask.sum(axis=0)
+    aligned_error = np.where(aligned_mask, shifted - reference, 0.0)
+    rmse_aligned = np.where(aligned_samples > 0,
+                            np.sqrt(np.sum(aligned_error**2, axis=0) / np.maximum(aligned_samples, 1)), np.nan)
+
+    # 부드러움: 연속 3개 샘플이 모두 유효한 2차 차분
+    jerk_mask = mask[2:] & mask[1:-1] & mask[:-2]
+    jerk_samples = jerk_mask.sum(axis=0)
+    second_diff = np.where(jerk_mask, np.abs(np.diff(outputs, n=2, axis=0)), 0.0)
+    jerk = np.where(jerk_samples > 0, np.sum(second_diff, axis=0) / np.maximum(jerk_samples, 1), np.nan)
+
+    return {
+        'rmse': rmse,
+        'rmse_aligned': rmse_aligned,
+        'lag': lag_samples * dt,
+        'jerk': jerk,
+        'samples': samples
+    }
@@ -0,0 +1,134 @@
+"""
+Batched Inverse Kinematics
+평면 로봇 팔의 끝점 목표 (위치 + 선택적 손목 방향)를 관절 각도로 변환하는 일괄 역기구학 모듈
+"""
+
+import numpy as np
+
+class InverseKinematicsSolver:
+    """일괄 역기구학 풀이기 (3관절 해석해 + 감쇠 최소제곱 반복)
+
+    손목 방향이 주어진 3관절 팔은 손목 위치의 2링크 해석해로 풀고, 그 밖의 경우
+    (방향 미지정, 일반 N관절, 해석해가 관절 한계를 벗어나는 목표)는 감쇠 최소제곱
+    (DLS) 반복 후 관절 한계로 투영한다. 목표는 (..., 2) 배열이며 모든 목표를 한
+    번에 푼다 (틱마다 방법/팔 M개, 또는 녹화된 궤적 T개).
+    """
+
+    def __init__(self, model, damping=0.05, max_iterations=50, tolerance=1e-4, orientation_weight=0.3,
+                 workspace=None):
+        self.model = model
+        self.damping = damping                      # DLS 감쇠 계수 (특이점 근처 안정화)
+        self.max_iterations = max_iterations
+        self.tolerance = tolerance                  # 끝점 위치 오차 허용값
+        self.orientation_weight = orientation_weight  # 방향 오차 1 rad 당 위치 오차 환산 길이
+        # 작업 공간 인덱스 (있으면 초기값 없는 목표를 최근접 대표 자세에서 시작)
+        self.workspace = workspace
+        self.previous = None  # 직전 해 (다음 호출의 초기값)
+
+    def initial_guess(self, targets):
+        """초기 자세 (..., J): 직전 해 -> 작업 공간 최근접 자세 -> 관절 한계 중앙"""
+        shape = targets.shape[:-1] + (self.model.n_joints,)
+        if self.previous is not None and self.previous.shape == shape:
+            return self.previous
+        if self.workspace is not None:
+            return self.workspace.nearest_configuration(targets)[0]
+        center = (self.model.lower_limits + self.model.upper_limits) / 2
+        return np.broadcast_to(center, shape)
+
+    def solve(self, targets, orientation=None, initial=None):
+        """끝점 목표 (..., 2)와 손목 방향 (..., ) [deg, 관절 각도 합] -> (관절 각도 (..., J), 위치 오차 (...))
+
+        initial: 초기 자세 (..., J) - 미지정 시 initial_guess 사용
+        """
+        targets = np.asarray(targets, dtype=float)
+        if orientation is not None:
+            orientation = np.broadcast_to(np.asarray(orientation, dtype=float), targets.shape[:-1])
+        initial = self.initial_guess(targets) if initial is None else np.asarray(initial, dtype=float)
+
+        # 평탄화해 (N, ...)로 풀이
+        shape = targets.shape[:-1]
+        flat_targets = targets.reshape(-1, 2)
+        flat_orientation = None if orientation is None else orientation.reshape(-1)
+        flat_initial = np.broadcast_to(initial, shape + (self.model.n_joints,)).reshape(-1, self.model.n_joints)
+
+        if flat_orientation is not None and self.model.n_joints == 3:
+            angles = self.solve_analytic(flat_targets, flat_orientation, flat_initial)
+            error = self.position_error(angles, flat_targets)
+            # 해석해가 한계에 잘렸거나 도달 불가한 목표만 반복 보정
+            refine = error > self.tolerance
+            if np.any(refine):
+                angles[refine] = self.solve_dls(flat_targets[refine], flat_orientation[refine], angles[refine])
+                error[refine] = self.position_error(angles[refine], flat_targets[refine])
+        else:
+            angles = self.solve_dls(flat_targets, flat_orientation, flat_initial)
+            error = self.position_error(angles, flat_targets)
+        angles = angles.reshape(shape + (self.model.n_joints,))
+        self.previous = angles
+        return angles, error.reshape(shape)
+
+    def solve_analytic(self, targets, orientation, initial):
+        """3관절 해석해: 손목 위치 2링크 풀이 (팔꿈치 두 해 중 한계 위반이 작고 초기값에 가까운 해)"""
+        l1, l2, l3 = self.model.link_lengths
+        phi = np.radians(orientation)
+        wrist = targets - l3 * np.stack([np.cos(phi), np.sin(phi)], axis=-1)
+
+        # 도달 불가한 손목 위치는 최대/최소 거리로 투영 (cos 범위 제한)
+        cos_elbow = (np.sum(wrist**2, axis=-1) - l1**2 - l2**2) / (2 * l1 * l2)
+        elbow = np.arccos(np.clip(cos_elbow, -1.0, 1.0))
+
+        candidates = []
+        for sign in (1.0, -1.0):
+            q2 = sign * elbow
+            q1 = np.arctan2(wrist[:, 1], wrist[:, 0]) - np.arctan2(l2 * np.sin(q2), l1 + l2 * np.cos(q2))
+            angles = np.degrees(np.stack([q1, q2, phi - q1 - q2], axis=-1))
+            # 초기값과 가장 가까운 등가 각도 (360도 주기)로 정규화
+            angles = initial + (angles - initial + 180.0) % 360.0 - 180.0
+            candidates.append(angles)
+        candidates = np.stack(candidates)  # (2, N, 3)
+
+        clipped = np.clip(candidates, self.model.lower_limits, self.model.upper_limits)
+        violation = np.sum(np.abs(candidates - clipped), axis=-1)
+        distance = np.sum(np.abs(clipped - initial), axis=-1)
+        # 한계 위반 우선, 같으면 초기값과의 거리
+        choice = (violation[1] < violation[0]) | ((violation[1] == violation[0]) & (distance[1] < distance[0]))
+        return np.where(choice[:, None], clipped[1], clipped[0])
+
+    def solve_dls(self, targets, orientation, initial):
+        """감쇠 최소제곱 반복 (매 단계 관절 한계로 투영), 목표 (N, 2) -> 관절 각도 (N, J)"""
+        angles = np.clip(np.array(initial, dtype=float), self.model.lower_limits, self.model.upper_limits)
+        n_tasks = 2 if orientation is None else 3
+        damping = self.damping**2 * np.eye(n_tasks)
+        active = np.arange(len(angles))
+
+        for _ in range(self.max_iterations):
+            q = angles[active]
+            points = self.model.forward_kinematics(q)
+            end = points[:, -1]
+            error = targets[active] - end
+            done = np.sum(error**2, axis=-1) < self.tolerance**2
+
+            # 평면 회전 관절 자코비안 (rad 단위): 관절 j 회전 시 끝점 속도 = z x (끝점 - 관절 j)
+            lever = end[:, None, :] - points[:, :-1, :]
+            jacobian = np.stack([-lever[..., 1], lever[..., 0]], axis=1)  # (N, 2, J)
+            if orientation is not None:
+                orientation_error = np.radians(orientation[active] - np.sum(q, axis=-1))
+                error = np.concatenate([error, self.orientation_weight * orientation_error[:, None]], axis=-1)
+                row = np.full((len(q), 1, q.shape[1]), self.orientation_weight)
+                jacobian = np.concatenate([jacobian, row], axis=1)
+                done &= np.abs(orientation_error) < self.tolerance
+
+            # 수렴한 목표는 제외하고 계속
+            if np.all(done):
+                break
+            active, jacobian, error, q = active[~done], jacobian[~done], error[~done], q[~done]
+
+            # dq = J^T (J J^T + λ^2 I)^-1 e
+            gram = jacobian @ np.swapaxes(jacobian, 1, 2) + damping
+            step = np.einsum('nij,ni->nj', jacobian, np.linalg.solve(gram, error[..., None])[..., 0])
+            angles[active] = np.clip(q + np.degrees(step), self.model.lower_limits, self.model.upper_limits)
+
+        return angles
+
+    def position_error(self, angles, targets):
+        """끝점 위치 오차 (...)"""
+        return np.linalg.norm(self.model.forward_kinematics(angles)[..., -1, :] - targets, axis=-1)
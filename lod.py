@@ -0,0 +1,194 @@
+"""
+Level-of-Detail Decimation
+긴 시계열 이력을 픽셀 열 단위 최소/최대 (M4 방식)로 축약하는 모듈
+"""
+
+import numpy as np
+
+class MinMaxDecimator:
+    """증분 갱신되는 최소/최대 피라미드 인덱스 (M4 방식 다운샘플링)
+
+    레벨 L의 블록은 base * factor**L 개 샘플의 채널별 최소/최대와 그 위치를
+    저장한다. 조회 시 열당 블록이 여러 개가 되는 가장 거친 레벨을 골라
+    열마다 (첫 값, 최소, 최대, 마지막 값) 4개 점만 반환하므로 출력 크기는
+    이력 길이와 무관하게 열 수에 비례한다.
+    """
+
+    def __init__(self, n_channels, base=8, factor=4, capacity=4096, dtype=np.float64):
+        self.n_channels = n_channels
+        self.base = base
+        self.factor = factor
+        self.dtype = np.dtype(dtype)  # 값/블록 극값 저장 자료형 (시간은 float64)
+        self.times = np.zeros(capacity)
+        self.values = np.zeros((capacity, n_channels), self.dtype)
+        self.size = 0
+        # 레벨별 블록: [최소, 최대, 최소 위치, 최대 위치, 블록 수]
+        self.levels = []
+
+    def __len__(self):
+        return self.size
+
+    def clear(self):
+        """이력 및 인덱스 초기화"""
+        self.size = 0
+        self.levels = []
+
+    def append(self, t, values):
+        """샘플 하나 추가 (시간은 단조 증가해야 함)"""
+        self.extend(np.atleast_1d(t), np.reshape(values, (1, self.n_channels)))
+
+    def extend(self, times, values):
+        """여러 샘플 추가 후 새로 완성된 블록만 인덱싱"""
+        times = np.asarray(times, dtype=float)
+        values = np.asarray(values).reshape(len(times), self.n_channels)
+        end = self.size + len(times)
+        if end > len(self.times):
+            self._grow(end)
+        self.times[self.size:end] = times
+        self.values[self.size:end] = values
+        self.size = end
+        self._update_levels()
+
+    def _grow(self, required):
+        """저장 공간 두 배씩 확장"""
+        capacity = len(self.times)
+        while capacity < required:
+            capacity *= 2
+        for name in ('times', 'values'):
+            old = getattr(self, name)
+            new = np.zeros((capacity,) + old.shape[1:], dtype=old.dtype)
+            new[:self.size] = old[:self.size]
+            setattr(self, name, new)
+
+    def _update_levels(self):
+        """완성된 블록을 아래 레벨부터 차례로 집계"""
+        source_count, width, level = self.size, self.base, 0
+        while source_count >= width:
+            if level == len(self.levels):
+                self.levels.append(self._empty_level())
+            mins, maxs, argmins, argmaxs, count = self.levels[level]
+            complete = source_count // width
+            if complete == count:
+                break  # 상위 레벨도 바뀌지 않음
+            if complete > len(mins):
+                mins, maxs, argmins, argmaxs = self._grow_level(self.levels[level], complete)
+            new = slice(count, complete)
+            rows = slice(count * width, complete * width)
+            if level == 0:
+                # 원시 샘플에서 직접 집계
+                chunk = self.values[rows].reshape(-1, width, self.n_channels)
+                offsets = np.arange(count, complete)[:, None] * width
+                argmins[new] = offsets + np.argmin(chunk, axis=1)
+                argmaxs[new] = offsets + np.argmax(chunk, axis=1)
+                mins[new] = chunk.min(axis=1)
+                maxs[new] = chunk.max(axis=1)
+            else:
+                # 아래 레벨 블록 factor 개를 합침
+                lower_mins, lower_maxs, lower_argmins, lower_argmaxs, _ = self.levels[level - 1]
+                mins[new], argmins[new] = self._reduce(lower_mins[rows], lower_argmins[rows], width, np.argmin)
+                maxs[new], argmaxs[new] = self._reduce(lower_maxs[rows], lower_argmaxs[rows], width, np.argmax)
+            self.levels[level] = [mins, maxs, argmins, argmaxs, complete]
+            source_count, width, level = complete, self.factor, level + 1
+
+    def _empty_level(self):
+        """빈 레벨 저장소"""
+        n = 64
+        return [np.zeros((n, self.n_channels), self.dtype), np.zeros((n, self.n_channels), self.dtype),
+                np.zeros((n, self.n_channels), dtype=np.int64), np.zeros((n, self.n_channels), dtype=np.int64), 0]
+
+    def _grow_level(self, level, required):
+        """레벨 저장소 두 배씩 확장"""
+        capacity = len(level[0])
+        while capacity < required:
+            capacity *= 2
+        grown = []
+        for old in level[:4]:
+            new = np.zeros((capacity,) + old.shape[1:], dtype=old.dtype)
+            new[:level[4]] = old[:level[4]]
+            grown.append(new)
+        return grown
+
+    def _reduce(self, extremes, positions, width, select):
+        """width 개씩 묶어 극값과 그 샘플 위치 선택"""
+        extremes = extremes.reshape(-1, width, self.n_channels)
+        positions = positions.reshape(-1, width, self.n_channels)
+        pick = select(extremes, axis=1)[:, None, :]
+        return (np.take_along_axis(extremes, pick, axis=1)[:, 0],
+                np.take_along_axis(positions, pick, axis=1)[:, 0])
+
+    def block_size(self, level):
+        """레벨 level 블록의 샘플 수"""
+        return self.base * self.factor**level
+
+    def query(self, t_start, t_stop, n_columns):
+        """[t_start, t_stop] 구간을 n_columns 열로 축약
+
+        반환값: (times, values) 각각 (채널, 점 수) 배열. 구간 샘플 수가
+        열 수의 4배 이하이면 원시 샘플을 그대로 반환한다.
+        """
+        start = int(np.searchsorted(self.times[:self.size], t_start, side='left'))
+        stop = int(np.searchsorted(self.times[:self.size], t_stop, side='right'))
+        n = stop - start
+        n_columns = max(int(n_columns), 1)
+        if n <= 4 * n_columns:
+            times = np.broadcast_to(self.times[start:stop], (self.n_channels, n))
+            return times, self.values[start:stop].T
+
+        # 열당 블록이 4개 이상 되는 가장 거친 레벨 (열 경계 오차 < 열 폭의 1/4)
+        samples_per_column = n / n_columns
+        level = -1
+        while (level + 1 < len(self.levels) and self.levels[level + 1][4] > 0
+               and self.block_size(level + 1) * 4 <= samples_per_column):
+            level += 1
+
+        mins, maxs, argmins, argmaxs, unit_starts = self._units(start, stop, level)
+
+        # 각 단위를 시작 샘플 기준으로 열에 배정 후 열별 최소/최대 집계
+        columns = ((unit_starts - start) * n_columns) // n
+        first = np.flatnonzero(np.r_[True, columns[1:] != columns[:-1]])
+        column_min = np.minimum.reduceat(mins, first, axis=0)
+        column_max = np.maximum.reduceat(maxs, first, axis=0)
+        # 극값을 가진 단위 중 가장 이른 샘플 위치
+        group = np.repeat(np.arange(len(first)), np.diff(np.r_[first, len(mins)]))
+        column_argmin = np.minimum.reduceat(np.where(mins == column_min[group], argmins, stop), first, axis=0)
+        column_argmax = np.minimum.reduceat(np.where(maxs == column_max[group], argmaxs, stop), first, axis=0)
+
+        column_first = np.broadcast_to(unit_starts[first][:, None], column_min.shape)
+        column_last = np.broadcast_to((np.r_[unit_starts[first[1:]], stop] - 1)[:, None], column_min.shape)
+
+        # 열마다 4개 점을 시간 순으로 정렬: (열, 4, 채널) -> (채널, 열*4)
+        indices = np.sort(np.stack([column_first, column_argmin, column_argmax, column_last], axis=1), axis=1)
+        indices = indices.reshape(-1, self.n_channels).T
+        return self.times[indices], np.take_along_axis(self.values[:self.size].T, indices, axis=1)
+
+    def _units(self, start, stop, level):
+        """구간을 레벨 블록과 양끝 부분 구간 단위로 분할"""
+        if level < 0:
+            # 인덱스를 쓰지 않고 원시 샘플을 단위로 사용
+            positions = np.broadcast_to(np.arange(start, stop)[:, None], (stop - start, self.n_channels))
+            values = self.values[start:stop]
+            return values, values, positions, positions, np.arange(start, stop)
+
+        size = self.block_size(level)
+        mins, maxs, argmins, argmaxs, count = self.levels[level]
+        block_start = min(-(-start // size), count)
+        block_stop = max(min(stop // size, count), block_start)
+
+        parts = []
+        if start < block_start * size:
+            parts.append(self._partial(start, min(block_start * size, stop)))
+        if block_stop > block_start:
+            blocks = slice(block_start, block_stop)
+            parts.append((mins[blocks], maxs[blocks], argmins[blocks], argmaxs[blocks],
+                          np.arange(block_start, block_stop) * size))
+        tail = max(block_stop * size, start)
+        if tail < stop:
+            parts.append(self._partial(tail, stop))
+        return tuple(np.concatenate(items) for items in zip(*parts))
+
+    def _partial(self, start, stop):
+        """블록 경계에 맞지 않는 구간을 단일 단위로 집계"""
+        chunk = self.values[start:stop]
+        return (chunk.min(axis=0)[None], chunk.max(axis=0)[None],
+                (start + np.argmin(chunk, axis=0))[None], (start + np.argmax(chunk, axis=0))[None],
+                np.array([start]))
@@ -12,7 +12,15 @@ Human-Robot Trajectory Control Simulation
 
 파일 구조:
 ├── simulation_core.py    # 핵심 시뮬레이션 로직
+├── robot_model.py        # 로봇 관절 체인 모델
 ├── visualization.py      # 시각화 모듈
+├── multi_arm.py          # 다중 로봇 팔 시뮬레이션
+├── recording.py          # 세션 녹화 및 재생
+├── lod.py                # 장기 이력 최소/최대 축약 (LOD)
+├── evaluation.py         # 시간 정렬 추종 지표 (지연 추정, RMSE, 저크)
+├── workspace.py          # 작업 공간 도달 영역 격자 및 최근접 자세 인덱스 (디스크 캐시)
+├── inverse_kinematics.py # 일괄 역기구학 (해석해 + 감쇠 최소제곱)
+├── shared_state.py       # 공유 메모리 상태 게시 (다른 프로세스의 잠금 없는 읽기)
 └── main.py              # 메인 실행 파일 (현재 파일)
 """
 
@@ -46,10 +54,12 @@ def print_usage_info():
     print("  • Blue line: Human motion (reference)")
     print("  • Green solid line: Spline-based robot control")
     print("  • Red dashed line: Direct mapping robot control")
+    print("  • Magenta dash-dot line: Alpha-beta-gamma filter robot control")
     print()
     print("🎮 CONTROLS:")
     print("  • Start/Stop button: Control simulation")
     print("  • Noise Level slider: Adjust sensor noise (0.0~0.2)")
+    print("  • Long History button: Toggle joint charts to the last 5 minutes (min/max decimated)")
     print()
     print("📈 CHARTS EXPLANATION:")
     print("  • Top 3 charts: Individual joint comparisons")
@@ -97,15 +107,274 @@ def demo_without_gui():
             metrics = simulation.get_performance_metrics()
             if metrics and 'spline' in metrics:
                 print(f"Time: {simulation.current_time:.1f}s")
-                for joint in ['shoulder', 'elbow', 'wrist']:
+                for joint in simulation.joint_keys:
                     if joint in metrics['spline']:
-                        rmse_s = metrics['spline'][joint]['rmse']
-                        rmse_d = metrics['direct'][joint]['rmse']
-                        print(f"  {joint}: Spline RMSE={rmse_s:.2f}, Direct RMSE={rmse_d:.2f}")
+                        rmse = ", ".join(f"{method.label} RMSE={metrics[method.name][joint]['rmse']:.2f}"
+                                         for method in simulation.methods)
+                        print(f"  {joint}: {rmse}")
                 print()
     
+    timing = simulation.get_timing_stats()
+    print("Shared cost per tick: " + ", ".join(f"{stage}={cost:.1f}us"
+                                               for stage, cost in timing['shared'].items()))
+    print("Method cost per tick: " + ", ".join(f"{method}={cost:.1f}us"
+                                               for method, cost in timing['methods'].items()))
     print("✅ Demo completed")
 
+def demo_multi_arm(n_arms=100, dt=0.01, n_ticks=500):
+    """다중 로봇 팔 시뮬레이션 틱 비용 측정"""
+    from multi_arm import MultiArmSimulation
+    
+    print(f"🔧 Running {n_arms} arms at {1 / dt:.0f} Hz...")
+    
+    simulation = MultiArmSimulation(n_arms=n_arms, dt=dt)
+    simulation.run(n_ticks)
+    
+    stats = simulation.get_timing_stats()
+    print(f"  Mean tick: {stats['mean_tick_ms']:.3f} ms (max {stats['max_tick_ms']:.3f} ms)")
+    print(f"  Per arm: {stats['per_arm_us']:.2f} us")
+    print(f"  Real-time factor: {stats['realtime_factor']:.1f}x")
+    for stage, cost in stats['stages_ms'].items():
+        print(f"    {stage}: {cost:.3f} ms")
+    
+    metrics = simulation.get_performance_metrics()
+    for joint in simulation.joint_keys:
+        rmse_s = metrics['spline']['mean_rmse'][joint]
+        rmse_d = metrics['direct']['mean_rmse'][joint]
+        print(f"  {joint}: Spline RMSE={rmse_s:.2f}, Direct RMSE={rmse_d:.2f}")
+    
+    print("✅ Multi-arm demo completed")
+
+def demo_dual_rate(n_ticks=1200):
+    """스플라인 재피팅 주기/비동기 설정별 정확도, 틱 비용, 계수 경과 시간 비교"""
+    configs = {
+        'every tick': {},
+        'every 5 ticks': {'refit_interval': 5},
+        'window 400, every 10': {'fit_window': 400, 'refit_interval': 10},
+        'window 400, async': {'fit_window': 400, 'asynchronous': True}
+    }
+
+    print(f"🔧 Comparing spline refit schedules over {n_ticks} ticks...")
+    for label, options in configs.items():
+        simulation = RealTimeSimulation(window_size=SIMULATION_CONFIG['window_size'], methods=('spline',),
+                                        method_options={'spline': options}, seed=0)
+        for _ in range(n_ticks):
+            simulation.update_data()
+        simulation.close()
+
+        metrics = simulation.get_performance_metrics()['spline']
+        rmse = np.mean([metrics[joint]['rmse'] for joint in simulation.joint_keys])
+        cost = simulation.get_timing_stats()['methods']['spline']
+        staleness = simulation.get_staleness_stats()['spline']
+        print(f"  {label}: RMSE={rmse:.2f}°, tick cost={cost:.1f}us, "
+              f"staleness mean={staleness['mean_ms']:.0f}ms max={staleness['max_ms']:.0f}ms")
+
+    print("✅ Dual-rate demo completed")
+
+def demo_snapshot_fork(warmup_ticks=400, variant_ticks=200, noise_levels=(0.0, 0.02, 0.05, 0.1, 0.2)):
+    """예열된 스냅샷에서 노이즈 레벨별 변형 실행 (예열 재시뮬레이션 없이)"""
+    import time
+
+    print(f"🔧 Warming up {warmup_ticks} ticks, then forking {len(noise_levels)} variants...")
+    simulation = RealTimeSimulation(window_size=SIMULATION_CONFIG['window_size'], seed=0)
+    start = time.perf_counter()
+    for _ in range(warmup_ticks):
+        simulation.update_data()
+    warmup_cost = time.perf_counter() - start
+
+    snapshot = simulation.snapshot()
+    start = time.perf_counter()
+    simulation.restore(snapshot)
+    restore_cost = time.perf_counter() - start
+    print(f"  Snapshot: {snapshot.nbytes} bytes, restore {restore_cost * 1e6:.0f}us "
+          f"(warm-up took {warmup_cost * 1000:.0f}ms)")
+
+    for noise_level in noise_levels:
+        variant = simulation.fork(snapshot, seed=1)
+        variant.sensor.noise_level = noise_level
+        for _ in range(variant_ticks):
+            variant.update_data()
+        metrics = variant.get_performance_metrics()
+        rmse = ", ".join(f"{method.label}={np.mean([metrics[method.name][j]['rmse'] for j in variant.joint_keys]):.2f}°"
+                         for method in variant.methods)
+        print(f"  noise {noise_level:.2f}: {rmse}")
+
+    print("✅ Snapshot fork demo completed")
+
+def demo_cartesian_mapping(n_ticks=600, trajectory_length=20000):
+    """관절 스케일링 매핑과 끝점 (역기구학) 매핑의 손 위치 추종 비교 + 궤적 일괄 역기구학"""
+    import time
+    from inverse_kinematics import InverseKinematicsSolver
+    from workspace import RobotWorkspace
+
+    print(f"🔧 Comparing joint and cartesian mapping over {n_ticks} ticks...")
+    for mapping in ('joint', 'cartesian'):
+        simulation = RealTimeSimulation(window_size=SIMULATION_CONFIG['window_size'], seed=0, mapping=mapping)
+        hand_error = np.zeros(len(simulation.methods))
+        start = time.perf_counter()
+        for _ in range(n_ticks):
+            simulation.update_data()
+            # 로봇 끝점과 인간 손 위치 (로봇 좌표계) 거리
+            hand = simulation.controller.hand_pose(simulation.human_data.last())[0]
+            end = simulation.model.forward_kinematics(simulation.current_robot_angles)[:, -1]
+            hand_error += np.linalg.norm(end - hand, axis=-1)
+        tick_cost = (time.perf_counter() - start) / n_ticks
+        error = ", ".join(f"{method.label}={hand_error[m] / n_ticks:.3f}"
+                          for m, method in enumerate(simulation.methods))
+        print(f"  {mapping}: mean hand distance {error} ({tick_cost * 1e6:.0f}us/tick)")
+
+    # 녹화된 길이의 손 궤적 전체를 한 번에 풀이
+    model = simulation.model
+    sensor_angles = simulation.sensor.sample(np.arange(trajectory_length) * simulation.dt)
+    targets, orientation = simulation.controller.hand_pose(sensor_angles)
+    solver = InverseKinematicsSolver(model, workspace=RobotWorkspace.load_or_compute(model))
+    for label, orientation_target in (("analytic + DLS", orientation), ("DLS (position only)", None)):
+        # 직전 해 대신 작업 공간 최근접 자세에서 시작
+        solver.previous = None
+        start = time.perf_counter()
+        angles, error = solver.solve(targets, orientation_target)
+        cost = time.perf_counter() - start
+        within = np.all((angles >= model.lower_limits) & (angles <= model.upper_limits))
+        print(f"  {label}: {trajectory_length} targets in {cost * 1000:.1f}ms, "
+              f"max error {error.max():.2e}, within limits {within}")
+
+    print("✅ Cartesian mapping demo completed")
+
+def demo_shared_state(duration=2.0):
+    """공유 메모리로 게시한 상태를 별도 프로세스에서 추적 (일관성 검사 포함)"""
+    import multiprocessing
+    import time
+    from shared_state import SharedStatePublisher, follow
+
+    simulation = RealTimeSimulation(window_size=SIMULATION_CONFIG['window_size'], seed=0)
+    publisher = SharedStatePublisher(simulation)
+    print(f"🔧 Publishing to shared memory '{publisher.name}' ({publisher.nbytes} bytes) for {duration:.1f}s...")
+
+    with multiprocessing.Pool(1) as pool:
+        result = pool.apply_async(follow, (publisher.name, duration))
+        # 실시간 주기로 틱 진행 (읽기 프로세스와 코어를 나눠 씀)
+        next_tick = time.perf_counter()
+        while not result.ready():
+            simulation.update_data()
+            next_tick += simulation.dt
+            time.sleep(max(0.0, next_tick - time.perf_counter()))
+        stats = result.get()
+
+    print(f"  Published {simulation.tick_count} ticks, reader saw {stats['ticks']} "
+          f"({stats['reads']} reads, {stats['inconsistent']} inconsistent)")
+    publisher.close()
+    print("✅ Shared state demo completed")
+
+def benchmark_spline_backends(n_ticks=600, n_arms=1000, window_sizes=(50, 200), dt=0.01):
+    """lstsq와 슬라이딩 DFT 스플라인 피팅 백엔드의 정확도 차이 및 틱당 비용 비교"""
+    from multi_arm import MultiArmSimulation
+    from simulation_core import SlidingDFTFitter, TrigonometricSpline
+
+    print(f"🔧 Benchmarking spline fitting backends ({n_ticks} ticks)...")
+    results = {}
+
+    # 단일 팔: 예측 결과 차이와 스플라인 방법 틱당 비용
+    outputs, costs = {}, {}
+    for backend in ('lstsq', 'sliding_dft'):
+        simulation = RealTimeSimulation(window_size=SIMULATION_CONFIG['window_size'], seed=0, methods=('spline',),
+                                        method_options={'spline': {'backend': backend}})
+        trace = np.zeros((n_ticks, simulation.model.n_joints))
+        for i in range(n_ticks):
+            simulation.update_data()
+            trace[i] = simulation.current_robot_angles[0]
+        outputs[backend] = trace
+        costs[backend] = simulation.get_timing_stats()['methods']['spline']
+    diff = np.max(np.abs(outputs['lstsq'] - outputs['sliding_dft']))
+    print(f"  Single arm: spline method {costs['lstsq']:.1f}us -> {costs['sliding_dft']:.1f}us per tick, "
+          f"max output diff={diff:.2e} deg")
+    results['single'] = {'cost_us': costs, 'max_diff': diff}
+
+    # 다중 팔: 예열 (창 채우는 구간) 포함 전체 출력 차이, 피팅 단계 비용은 예열 후 측정
+    for window_size in window_sizes:
+        outputs, costs = {}, {}
+        for backend in ('lstsq', 'sliding_dft'):
+            multi = MultiArmSimulation(n_arms=n_arms, window_size=window_size, dt=dt, seed=0,
+                                       spline_backend=backend)
+            trace = []
+            for tick in range(window_size + n_ticks // 4):
+                if tick == window_size:
+                    multi.reset_timing_stats()
+                multi.update_data()
+                trace.append(multi.current_robot_angles_spline.copy())
+            outputs[backend] = np.array(trace)
+            costs[backend] = multi.stage_time['fit'] / multi.tick_count * 1000
+        diff = np.max(np.abs(outputs['lstsq'] - outputs['sliding_dft']))
+        print(f"  {n_arms} arms, window {window_size}: fit stage {costs['lstsq']:.3f}ms -> "
+              f"{costs['sliding_dft']:.3f}ms per tick, max output diff={diff:.2e} deg "
+              f"({multi.fitter.sliding_fits} sliding / {multi.fitter.fallback_fits} lstsq fits)")
+        results[f'multi_{window_size}'] = {'cost_ms': costs, 'max_diff': diff}
+
+    # 비균일 샘플링: lstsq 대체 경로 확인
+    rng = np.random.default_rng(0)
+    times = np.cumsum(dt * (1 + 0.2 * rng.uniform(-1, 1, SIMULATION_CONFIG['window_size'])))
+    angles = np.sin(times)[:, None] * np.array([30.0, 20.0, 10.0])
+    fitter, reference, spline = SlidingDFTFitter(shape=(3,), capacity=len(times)), TrigonometricSpline(), TrigonometricSpline()
+    fitter.update(times, angles)
+    fitter.fit(spline, times, angles)
+    reference.fit_batch(times, angles)
+    diff = np.max(np.abs(spline.coeff_matrix - reference.coeff_matrix))
+    print(f"  Jittered sampling: {fitter.fallback_fits} lstsq fallback fit(s), coefficient diff={diff:.1e}")
+
+    print("✅ Spline backend benchmark completed")
+    return results
+
+def benchmark_memory_modes(n_arms=1000, window_size=200, dt=0.01, n_ticks=300, record_ticks=6000):
+    """float64 / float32 저장 모드의 메모리 사용량 및 정확도 차이 비교"""
+    from multi_arm import MultiArmSimulation
+    from recording import SimulationRecorder
+
+    print(f"🔧 Benchmarking storage dtypes: {n_arms} arms, window {window_size}, {n_ticks} ticks...")
+
+    results = {}
+    for dtype in ('float64', 'float32'):
+        # 같은 센서 노이즈로 비교
+        multi = MultiArmSimulation(n_arms=n_arms, window_size=window_size, dt=dt, seed=0, dtype=dtype)
+        # 창이 채워지는 구간도 비교하도록 전체 출력 궤적 기록 (버퍼에는 마지막 창만 남음)
+        trajectory = {'spline': [], 'direct': []}
+        for _ in range(n_ticks):
+            multi.update_data()
+            trajectory['spline'].append(multi.current_robot_angles_spline.copy())
+            trajectory['direct'].append(multi.current_robot_angles_direct.copy())
+
+        single = RealTimeSimulation(window_size=SIMULATION_CONFIG['window_size'], dtype=dtype, seed=0)
+        recorder = SimulationRecorder(single).record(single, record_ticks)
+
+        results[dtype] = {
+            'multi': multi,
+            'trajectory': {method: np.array(outputs) for method, outputs in trajectory.items()},
+            'recorder': recorder,
+            'per_arm_bytes': multi.memory_footprint() / n_arms,
+            'tick_ms': multi.get_timing_stats()['mean_tick_ms'],
+            'metrics': multi.get_performance_metrics()
+        }
+
+    full, compact = results['float64'], results['float32']
+    print(f"  Multi-arm state per arm: {full['per_arm_bytes'] / 1024:.1f} KiB -> "
+          f"{compact['per_arm_bytes'] / 1024:.1f} KiB "
+          f"({full['per_arm_bytes'] / compact['per_arm_bytes']:.2f}x)")
+    print(f"  Mean tick: {full['tick_ms']:.3f} ms -> {compact['tick_ms']:.3f} ms")
+    print(f"  Recording of {record_ticks} ticks: {full['recorder'].nbytes / 1024:.1f} KiB -> "
+          f"{compact['recorder'].nbytes / 1024:.1f} KiB")
+
+    # 정확도 차이: 전체 출력 궤적 (워밍업 포함) 및 마지막 창 지표
+    for method in ('spline', 'direct'):
+        output_full = full['trajectory'][method]
+        output_compact = compact['trajectory'][method]
+        rmse_full = full['metrics'][method]['rmse']
+        rmse_compact = compact['metrics'][method]['rmse']
+        print(f"  {method}: max output diff={np.max(np.abs(output_full - output_compact)):.2e} deg, "
+              f"max RMSE diff={np.max(np.abs(rmse_full - rmse_compact)):.2e} deg")
+    replay_diff = np.max(np.abs(full['recorder'].robot[:record_ticks] - compact['recorder'].robot[:record_ticks]))
+    print(f"  Single-arm recording: max output diff={replay_diff:.2e} deg")
+
+    print("✅ Memory benchmark completed")
+    return results
+
 if __name__ == "__main__":
     print("Starting Human-Robot Trajectory Control Simulation...")
     
@@ -154,17 +423,39 @@ def get_simulation_stats(simulation):
     print("\n📊 SIMULATION STATISTICS:")
     print("-" * 40)
     
-    for joint in ['shoulder', 'elbow', 'wrist']:
-        if joint in metrics['spline'] and joint in metrics['direct']:
+    for joint in simulation.joint_keys:
+        if all(joint in metrics[method.name] for method in simulation.methods):
             print(f"\n{joint.upper()} JOINT:")
-            print(f"  RMSE - Spline: {metrics['spline'][joint]['rmse']:.2f}°")
-            print(f"  RMSE - Direct: {metrics['direct'][joint]['rmse']:.2f}°")
-            print(f"  Jerk - Spline: {metrics['spline'][joint]['jerk']:.3f}")
-            print(f"  Jerk - Direct: {metrics['direct'][joint]['jerk']:.3f}")
+            # 유효 샘플이 아직 없는 방법의 지표 (NaN)는 출력하지 않음
+            def measured(method, key):
+                return np.isfinite(metrics[method.name][joint][key])
+            
+            for method in simulation.methods:
+                if measured(method, 'rmse'):
+                    print(f"  RMSE - {method.label}: {metrics[method.name][joint]['rmse']:.2f}°")
+            for method in simulation.methods:
+                joint_metrics = metrics[method.name][joint]
+                if measured(method, 'lag_ms'):
+                    print(f"  Lag - {method.label}: {joint_metrics['lag_ms']:.1f} ms "
+                          f"(lag-compensated RMSE {joint_metrics['rmse_aligned']:.2f}°)")
+            for method in simulation.methods:
+                if measured(method, 'jerk'):
+                    print(f"  Jerk - {method.label}: {metrics[method.name][joint]['jerk']:.3f}")
             
-            improvement = ((metrics['direct'][joint]['rmse'] - metrics['spline'][joint]['rmse']) / 
-                          metrics['direct'][joint]['rmse']) * 100
-            print(f"  Improvement: {improvement:.1f}%")
+            # 직접 매핑 대비 RMSE 개선율 (직접 매핑이 비교 대상에 있고 양쪽 모두 측정된 경우만)
+            direct = next((method for method in simulation.methods if method.name == 'direct'), None)
+            if direct is not None and measured(direct, 'rmse'):
+                direct_rmse = metrics['direct'][joint]['rmse']
+                for method in simulation.methods:
+                    if method.name != 'direct' and measured(method, 'rmse'):
+                        improvement = (direct_rmse - metrics[method.name][joint]['rmse']) / direct_rmse * 100
+                        print(f"  Improvement - {method.label}: {improvement:.1f}%")
+    
+    reachability = simulation.get_reachability_stats()
+    if reachability:
+        print("\nUNREACHABLE PREDICTED TARGETS:")
+        for method in simulation.methods:
+            print(f"  {method.label}: {reachability[method.name]['unreachable_ratio'] * 100:.1f}% of ticks")
 
 def save_simulation_data(simulation, filename="simulation_data.npz"):
     """시뮬레이션 데이터 저장"""
@@ -172,22 +463,33 @@ def save_simulation_data(simulation, filename="simulation_data.npz"):
         print("No data to save")
         return
     
-    data = {
-        'time': np.array(simulation.time_window),
-        'human_shoulder': np.array(simulation.human_data['shoulder']),
-        'human_elbow': np.array(simulation.human_data['elbow']),
-        'human_wrist': np.array(simulation.human_data['wrist']),
-        'robot_spline_shoulder': np.array(simulation.robot_data_spline['shoulder']),
-        'robot_spline_elbow': np.array(simulation.robot_data_spline['elbow']),
-        'robot_spline_wrist': np.array(simulation.robot_data_spline['wrist']),
-        'robot_direct_shoulder': np.array(simulation.robot_data_direct['shoulder']),
-        'robot_direct_elbow': np.array(simulation.robot_data_direct['elbow']),
-        'robot_direct_wrist': np.array(simulation.robot_data_direct['wrist'])
-    }
+    data = {'time': simulation.time_window.view()}
+    for i, joint in enumerate(simulation.joint_keys):
+        data[f'human_{joint}'] = simulation.human_data.view()[:, i]
+        for method in simulation.method_names:
+            data[f'robot_{method}_{joint}'] = simulation.get_method_data(method)[:, i]
     
     np.savez(filename, **data)
     print(f"✅ Data saved to {filename}")
 
+def export_headless_session(n_ticks=1200, output="session_frames", video=False, step=1, workers=None):
+    """GUI 없이 세션을 실행/녹화한 뒤 프레임 또는 영상으로 내보내기"""
+    import matplotlib
+    matplotlib.use('Agg')
+    from recording import SimulationRecorder
+    from visualization import export_frames, export_video
+    
+    simulation = RealTimeSimulation(window_size=SIMULATION_CONFIG['window_size'])
+    recorder = SimulationRecorder(simulation).record(simulation, n_ticks)
+    print(f"🎬 Recorded {len(recorder)} ticks, rendering offscreen...")
+    
+    if video:
+        n_frames = export_video(recorder, output, step=step, workers=workers)
+    else:
+        n_frames = export_frames(recorder, output, step=step, workers=workers)
+    print(f"✅ Exported {n_frames} frames to {output}")
+    return recorder
+
 # 설정 상수들
 SIMULATION_CONFIG = {
     'window_size': 50,
@@ -0,0 +1,184 @@
+"""
+Multi-Arm Human-Robot Simulation
+여러 운용자-로봇 팔 쌍을 한 프로세스에서 동시에 시뮬레이션하는 모듈
+"""
+
+import time
+import numpy as np
+
+from robot_model import RobotModel
+from evaluation import evaluate_tracking
+from simulation_core import (HumanMotionSensor, RobotTrajectoryController, TrigonometricSpline, RingBuffer,
+                             SlidingDFTFitter, storage_dtype)
+
+class MultiArmSimulation:
+    """다중 로봇 팔 시뮬레이션 (struct-of-arrays 상태 공유)"""
+
+    def __init__(self, n_arms=100, window_size=50, dt=0.05, n_harmonics=3, seed=None, model=None,
+                 dtype=np.float64, refit_interval=1, mapping='joint', spline_backend='lstsq'):
+        self.model = model if model is not None else RobotModel.default()
+        # 각도 이력/계수 저장 자료형 (적분 상태와 최소제곱 풀이는 float64)
+        self.dtype = storage_dtype(dtype)
+        # 위상 오프셋과 센서 노이즈가 같은 난수 생성기를 사용 (seed로 실행 재현)
+        rng = np.random.default_rng(seed)
+        self.sensor = HumanMotionSensor(self.model, seed=rng)
+        self.spline = TrigonometricSpline(n_harmonics=n_harmonics, dtype=self.dtype)
+        # 'sliding_dft': 균일 창에서 모든 팔/관절 빈을 틱당 O(n_harmonics)로 갱신 (lstsq와 같은 계수)
+        self.fitter = (SlidingDFTFitter(n_harmonics, (n_arms, self.model.n_joints), window_size)
+                       if spline_backend == 'sliding_dft' else None)
+        self.controller = RobotTrajectoryController(self.model)
+        # 인간-로봇 매핑 방식: 'joint' 또는 'cartesian' (모든 팔을 한 번의 일괄 역기구학으로 풀이)
+        self.mapping = mapping
+
+        self.n_arms = n_arms
+        self.window_size = window_size
+        self.dt = dt
+        self.joint_keys = self.model.joint_names
+        # 듀얼 레이트: refit_interval 틱마다만 재피팅하고 그 사이에는 기존 계수로 예측
+        self.refit_interval = max(int(refit_interval), 1)
+        self.fit_end_time = None
+        self.ticks_since_fit = 0
+
+        # 운용자마다 다른 동작이 되도록 시간 위상 오프셋 부여
+        self.phase_offsets = rng.uniform(0, 100, n_arms)
+
+        shape = (n_arms, self.model.n_joints)
+        self.time_window = RingBuffer(window_size)
+        self.human_data = RingBuffer(window_size, shape, self.dtype)
+        self.robot_data_spline = RingBuffer(window_size, shape, self.dtype)
+        self.robot_data_direct = RingBuffer(window_size, shape, self.dtype)
+        # 방법별 (스플라인, 직접) 예측 준비 여부
+        self.ready_data = RingBuffer(window_size, (2,), bool)
+
+        self.current_robot_angles_spline = np.zeros(shape)
+        self.current_robot_angles_direct = np.zeros(shape)
+
+        self.current_time = 0
+        self.is_running = False
+
+        self.stage_names = ['sense', 'direct', 'fit', 'predict']
+        self.reset_timing_stats()
+
+    def reset_timing_stats(self):
+        """틱 비용 통계 초기화"""
+        self.tick_count = 0
+        self.staleness_total = 0.0
+        self.stage_time = dict.fromkeys(self.stage_names, 0.0)
+        self.total_time = 0.0
+        self.max_tick_time = 0.0
+
+    def update_data(self):
+        """모든 팔에 대해 한 틱 진행"""
+        tick_start = time.perf_counter()
+
+        # 센서 읽기: (n_arms, n_joints)
+        human_angles = self.sensor.sample(self.current_time + self.phase_offsets)
+        self.time_window.append(self.current_time)
+        self.human_data.append(human_angles)
+        t_sense = time.perf_counter()
+
+        # 방법 1: 직접 매핑
+        target_direct = self.controller.map_targets(human_angles, self.mapping,
+                                                    initial=self.current_robot_angles_direct)
+        self.current_robot_angles_direct = self.controller.limit_velocity(
+            self.current_robot_angles_direct, target_direct, self.dt)
+        self.robot_data_direct.append(self.current_robot_angles_direct)
+        t_direct = time.perf_counter()
+
+        # 방법 2: 스플라인 적용 (모든 팔/관절을 하나의 최소제곱 문제로 피팅)
+        if self.fitter is not None:
+            self.fitter.update(self.time_window.view(), self.human_data.view())
+        if len(self.time_window) >= 10:
+            if self.fit_end_time is None or self.ticks_since_fit >= self.refit_interval:
+                if self.fitter is not None:
+                    self.fitter.fit(self.spline, self.time_window.view(), self.human_data.view())
+                else:
+                    self.spline.fit_batch(self.time_window.view(), self.human_data.view())
+                self.fit_end_time = self.current_time
+                self.ticks_since_fit = 0
+            self.ticks_since_fit += 1
+            self.staleness_total += self.current_time - self.fit_end_time
+            t_fit = time.perf_counter()
+
+            # 미래 시점 예측 후 인간-로봇 변환 및 속도 제한
+            predicted = self.spline.predict_batch(self.current_time + self.dt)
+            target_spline = self.controller.map_targets(predicted, self.mapping,
+                                                        initial=self.current_robot_angles_spline)
+            self.current_robot_angles_spline = self.controller.limit_velocity(
+                self.current_robot_angles_spline, target_spline, self.dt)
+            self.robot_data_spline.append(self.current_robot_angles_spline)
+            self.ready_data.append((True, True))
+        else:
+            t_fit = time.perf_counter()
+            self.robot_data_spline.append(0)
+            self.ready_data.append((False, True))
+        tick_end = time.perf_counter()
+
+        # 틱 비용 누적
+        self.stage_time['sense'] += t_sense - tick_start
+        self.stage_time['direct'] += t_direct - t_sense
+        self.stage_time['fit'] += t_fit - t_direct
+        self.stage_time['predict'] += tick_end - t_fit
+        self.total_time += tick_end - tick_start
+        self.max_tick_time = max(self.max_tick_time, tick_end - tick_start)
+        self.tick_count += 1
+
+        self.current_time += self.dt
+
+    def run(self, n_ticks):
+        """n_ticks 만큼 연속 실행"""
+        for _ in range(n_ticks):
+            self.update_data()
+
+    def get_timing_stats(self):
+        """집계 및 팔 당 틱 비용 (ms / us 단위)"""
+        if self.tick_count == 0:
+            return {}
+
+        mean_tick = self.total_time / self.tick_count
+        return {
+            'ticks': self.tick_count,
+            'mean_tick_ms': mean_tick * 1000,
+            'max_tick_ms': self.max_tick_time * 1000,
+            'per_arm_us': mean_tick / self.n_arms * 1e6,
+            'stages_ms': {name: total / self.tick_count * 1000
+                          for name, total in self.stage_time.items()},
+            'realtime_factor': self.dt / mean_tick,
+            'staleness_ms': self.staleness_total / self.tick_count * 1000
+        }
+
+    def memory_footprint(self):
+        """이력 버퍼, 상태, 스플라인 계수의 메모리 사용량 (bytes)"""
+        buffers = (self.time_window, self.human_data, self.robot_data_spline, self.robot_data_direct,
+                   self.ready_data)
+        state = (self.current_robot_angles_spline, self.current_robot_angles_direct, self.phase_offsets)
+        total = sum(buffer.nbytes for buffer in buffers) + sum(array.nbytes for array in state)
+        if self.spline.coeff_matrix is not None:
+            total += self.spline.coeff_matrix.nbytes
+        return total
+    
+    def get_performance_metrics(self):
+        """팔/관절별 성능 지표 계산 (RMSE, 저크)"""
+        if len(self.time_window) < 10:
+            return {}
+
+        # 두 방법을 한 번에 평가: (시간, 방법, 팔, 관절), 로봇 각도는 t + dt 시각으로 정렬
+        times = self.time_window.view()
+        outputs = np.stack((self.robot_data_spline.view(), self.robot_data_direct.view()), axis=1)
+        result = evaluate_tracking(times, self.human_data.view(), outputs, output_times=times + self.dt,
+                                   valid=self.ready_data.view())
+        
+        metrics = {}
+        for m, method in enumerate(('spline', 'direct')):
+            # 배열 형태: (n_arms, n_joints)
+            rmse, jerk = result['rmse'][m], result['jerk'][m]
+            metrics[method] = {
+                'rmse': rmse,
+                'rmse_aligned': result['rmse_aligned'][m],
+                'lag_ms': result['lag'][m] * 1000,
+                'jerk': jerk,
+                'mean_rmse': dict(zip(self.joint_keys, rmse.mean(axis=0))),
+                'mean_jerk': dict(zip(self.joint_keys, jerk.mean(axis=0)))
+            }
+
+        return metrics
@@ -0,0 +1,194 @@
+"""
+Simulation Recording and Replay
+시뮬레이션 세션 전체를 녹화하고 재생하는 모듈 (오프라인 분석/영상 내보내기용)
+"""
+
+import numpy as np
+
+from robot_model import RobotModel
+from simulation_core import PREDICTION_METHODS, PredictionMethod, RealTimeSimulation, storage_dtype
+
+def method_style(name):
+    """표시 속성이 기록되지 않은 방법의 (label, color, linestyle): 등록된 방법은 클래스 값, 그 밖은 기본값"""
+    cls = PREDICTION_METHODS.get(name, PredictionMethod)
+    return (cls.label or name, cls.color, cls.linestyle)
+
+class RecordedMethod(PredictionMethod):
+    """재생용 방법 자리표시자 (예측 없이 이름과 표시 속성만 보유)"""
+
+    def __init__(self, model, name, label, color, linestyle):
+        super().__init__(model, name, label)
+        self.color = color
+        self.linestyle = linestyle
+
+class SimulationRecorder:
+    """시뮬레이션 세션 녹화기 (전체 이력을 확장 가능한 배열에 저장)"""
+
+    def __init__(self, simulation=None, capacity=4096, dtype=None):
+        self.times = None
+        self.human = None
+        self.robot = None
+        self.ready = None
+        self.size = 0
+        self._capacity = capacity
+        # 각도 저장 자료형 (None이면 시뮬레이션 설정을 따름, 시간은 항상 float64)
+        self._dtype = dtype
+
+        if simulation is not None:
+            self.attach(simulation)
+
+    def attach(self, simulation):
+        """시뮬레이션에 연결하여 매 틱 자동 녹화"""
+        self.model = simulation.model
+        self.method_names = list(simulation.method_names)
+        self.method_styles = [(method.label, method.color, method.linestyle) for method in simulation.methods]
+        self.dt = simulation.dt
+        self.window_size = simulation.window_size
+
+        n_methods, n_joints = len(self.method_names), self.model.n_joints
+        dtype = storage_dtype(self._dtype if self._dtype is not None else simulation.dtype)
+        self.times = np.zeros(self._capacity)
+        self.human = np.zeros((self._capacity, n_joints), dtype)
+        self.robot = np.zeros((self._capacity, n_methods, n_joints), dtype)
+        self.ready = np.zeros((self._capacity, n_methods), dtype=bool)
+        self.size = 0
+
+        simulation.add_tick_listener(self)
+
+    def __len__(self):
+        return self.size
+
+    @property
+    def nbytes(self):
+        """녹화 저장 공간 크기 (bytes)"""
+        return self.times.nbytes + self.human.nbytes + self.robot.nbytes + self.ready.nbytes
+
+    def __call__(self, simulation):
+        """틱 콜백: 최신 샘플 추가"""
+        self.append(simulation.time_window.last(), simulation.human_data.last(),
+                    simulation.robot_data.last(), simulation.ready_data.last())
+
+    def append(self, t, human, robot, ready=True):
+        """샘플 추가 (용량 부족 시 두 배로 확장)"""
+        if self.size == len(self.times):
+            self._grow()
+        self.times[self.size] = t
+        self.human[self.size] = human
+        self.robot[self.size] = robot
+        self.ready[self.size] = ready
+        self.size += 1
+
+    def _grow(self):
+        """저장 공간 두 배 확장"""
+        capacity = 2 * len(self.times)
+        for name in ('times', 'human', 'robot', 'ready'):
+            old = getattr(self, name)
+            new = np.zeros((capacity,) + old.shape[1:], dtype=old.dtype)
+            new[:self.size] = old[:self.size]
+            setattr(self, name, new)
+
+    def slice(self, start, stop):
+        """[start, stop) 구간만 담은 새 녹화 객체 (복사본)"""
+        recorder = SimulationRecorder()
+        recorder.model = self.model
+        recorder.method_names = list(self.method_names)
+        recorder.method_styles = list(self.method_styles)
+        recorder.dt = self.dt
+        recorder.window_size = self.window_size
+        recorder.times = self.times[start:stop].copy()
+        recorder.human = self.human[start:stop].copy()
+        recorder.robot = self.robot[start:stop].copy()
+        recorder.ready = self.ready[start:stop].copy()
+        recorder.size = len(recorder.times)
+        return recorder
+
+    def record(self, simulation, n_ticks):
+        """헤드리스로 n_ticks 만큼 실행하며 녹화"""
+        if self.times is None:
+            self.attach(simulation)
+        for _ in range(n_ticks):
+            simulation.update_data()
+        return self
+
+    def save(self, filename):
+        """녹화 데이터를 npz 파일로 저장"""
+        params = self.model.parameters()
+        np.savez(
+            filename,
+            times=self.times[:self.size],
+            human=self.human[:self.size],
+            robot=self.robot[:self.size],
+            ready=self.ready[:self.size],
+            method_names=np.array(self.method_names),
+            method_styles=np.array(self.method_styles),
+            dt=self.dt,
+            window_size=self.window_size,
+            **{f'model_{key}': np.asarray(value) for key, value in params.items()}
+        )
+
+    @classmethod
+    def load(cls, filename):
+        """npz 파일에서 녹화 데이터 불러오기"""
+        data = np.load(filename)
+        recorder = cls()
+        recorder.model = RobotModel(**{key[len('model_'):]: data[key] for key in data.files
+                                       if key.startswith('model_')})
+        recorder.method_names = [str(name) for name in data['method_names']]
+        # 표시 속성이 없는 이전 녹화는 이름으로 결정
+        recorder.method_styles = ([tuple(str(value) for value in style) for style in data['method_styles']]
+                                  if 'method_styles' in data.files else
+                                  [method_style(name) for name in recorder.method_names])
+        recorder.dt = float(data['dt'])
+        recorder.window_size = int(data['window_size'])
+        recorder.times = data['times']
+        recorder.human = data['human']
+        recorder.robot = data['robot']
+        # 준비 여부가 없는 이전 녹화는 모든 샘플을 유효로 간주
+        recorder.ready = data['ready'] if 'ready' in data.files else np.ones(recorder.robot.shape[:2], dtype=bool)
+        recorder.size = len(recorder.times)
+        return recorder
+
+class ReplaySimulation(RealTimeSimulation):
+    """녹화된 세션 재생 (예측 계산 없이 기록된 샘플로 버퍼만 갱신)
+
+    예측 방법은 이름과 표시 속성만 가진 자리표시자이므로 등록되지 않은 방법의 녹화도 재생된다.
+    """
+
+    def __init__(self, recording, window_size=None):
+        methods = [RecordedMethod(recording.model, name, *style)
+                   for name, style in zip(recording.method_names, recording.method_styles)]
+        super().__init__(window_size=window_size or recording.window_size, model=recording.model,
+                         methods=methods, dtype=recording.human.dtype)
+        self.recording = recording
+        self.dt = recording.dt
+        self.frame = 0  # 다음에 재생할 샘플 인덱스
+
+    def seek(self, index):
+        """index 번째 샘플까지 재생된 상태로 이동"""
+        start = max(0, index + 1 - self.window_size)
+        stop = index + 1
+        self.time_window.load(self.recording.times[start:stop])
+        self.human_data.load(self.recording.human[start:stop])
+        self.robot_data.load(self.recording.robot[start:stop])
+        self.ready_data.load(self.recording.ready[start:stop])
+        self.current_robot_angles = self.recording.robot[index].copy()
+        self.current_time = self.recording.times[index] + self.dt
+        self.frame = stop
+
+    def update_data(self):
+        """다음 녹화 샘플 재생 (끝에 도달하면 정지)"""
+        if self.frame >= len(self.recording):
+            self.is_running = False
+            return
+
+        i = self.frame
+        self.time_window.append(self.recording.times[i])
+        self.human_data.append(self.recording.human[i])
+        self.robot_data.append(self.recording.robot[i])
+        self.ready_data.append(self.recording.ready[i])
+        self.current_robot_angles = self.recording.robot[i].copy()
+        self.current_time = self.recording.times[i] + self.dt
+        self.frame += 1
+
+        for listener in self.tick_listeners:
+            listener(self)
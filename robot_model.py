@@ -0,0 +1,88 @@
+"""
+Robot Kinematic Chain Model
+N 관절 평면 로봇 팔의 파라미터를 한 곳에서 정의하고 배열로 캐시하는 모듈
+"""
+
+import numpy as np
+
+class RobotModel:
+    """N 관절 평면 로봇 팔 모델 (관절 인덱스 및 파라미터 벡터 캐시)"""
+
+    def __init__(self, joint_names, joint_limits, velocity_limits, scaling_factors, link_lengths,
+                 acceleration_limits=None, jerk_limits=None):
+        self.joint_names = tuple(joint_names)
+        self.n_joints = len(self.joint_names)
+        self.joint_index = {name: i for i, name in enumerate(self.joint_names)}
+
+        # 파라미터 벡터 (관절 순서대로 정렬)
+        limits = np.asarray(joint_limits, dtype=float).reshape(self.n_joints, 2)
+        self.lower_limits = limits[:, 0].copy()
+        self.upper_limits = limits[:, 1].copy()
+        self.velocity_limits = np.asarray(velocity_limits, dtype=float).reshape(self.n_joints)
+        self.scaling_factors = np.asarray(scaling_factors, dtype=float).reshape(self.n_joints)
+        self.link_lengths = np.asarray(link_lengths, dtype=float).reshape(self.n_joints)
+        # 가속도/저크 한계 미지정 시 속도 한계 기준으로 설정
+        if acceleration_limits is None:
+            acceleration_limits = 3 * self.velocity_limits
+        if jerk_limits is None:
+            jerk_limits = 30 * self.velocity_limits
+        self.acceleration_limits = np.asarray(acceleration_limits, dtype=float).reshape(self.n_joints)
+        self.jerk_limits = np.asarray(jerk_limits, dtype=float).reshape(self.n_joints)
+
+        self._max_step_cache = {}
+
+    @classmethod
+    def default(cls):
+        """기본 3관절 (어깨-팔꿈치-손목) 로봇 팔"""
+        return cls(
+            joint_names=('shoulder', 'elbow', 'wrist'),
+            joint_limits=[(-90, 90), (0, 150), (-60, 60)],
+            velocity_limits=[50, 80, 100],       # deg/s
+            scaling_factors=[0.8, 0.9, 1.0],     # 인간-로봇 크기 차이 보정
+            link_lengths=[1.0, 0.8, 0.3],
+            acceleration_limits=[150, 240, 300],  # deg/s^2
+            jerk_limits=[1500, 2400, 3000]        # deg/s^3
+        )
+
+    def parameters(self):
+        """모델 파라미터 딕셔너리 (RobotModel(**params)로 재생성 가능)"""
+        return {
+            'joint_names': self.joint_names,
+            'joint_limits': np.stack([self.lower_limits, self.upper_limits], axis=1),
+            'velocity_limits': self.velocity_limits,
+            'scaling_factors': self.scaling_factors,
+            'link_lengths': self.link_lengths,
+            'acceleration_limits': self.acceleration_limits,
+            'jerk_limits': self.jerk_limits
+        }
+
+    @property
+    def reach(self):
+        """최대 도달 거리"""
+        return float(np.sum(self.link_lengths))
+
+    def max_step(self, dt):
+        """주기 dt 동안의 관절별 최대 각도 변화량 (캐시됨)"""
+        step = self._max_step_cache.get(dt)
+        if step is None:
+            step = self.velocity_limits * dt
+            self._max_step_cache[dt] = step
+        return step
+
+    def to_array(self, joint_values):
+        """관절 이름 딕셔너리를 관절 순서 배열로 변환"""
+        return np.array([joint_values[name] for name in self.joint_names], dtype=float)
+
+    def to_dict(self, values):
+        """관절 순서 배열을 관절 이름 딕셔너리로 변환"""
+        return dict(zip(self.joint_names, values))
+
+    def forward_kinematics(self, angles):
+        """순기구학: 관절 각도 (..., J) [deg] -> 관절/끝점 위치 (..., J+1, 2)"""
+        angles = np.asarray(angles, dtype=float)
+        cumulative = np.cumsum(np.radians(angles), axis=-1)
+
+        points = np.zeros(angles.shape[:-1] + (self.n_joints + 1, 2))
+        points[..., 1:, 0] = np.cumsum(self.link_lengths * np.cos(cumulative), axis=-1)
+        points[..., 1:, 1] = np.cumsum(self.link_lengths * np.sin(cumulative), axis=-1)
+        return points
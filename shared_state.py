@@ -0,0 +1,243 @@
+"""
+Shared-Memory State Publication
+시뮬레이션 버퍼와 현재 상태를 공유 메모리에 게시해 다른 프로세스가 잠금 없이 읽게 하는 모듈
+"""
+
+import json
+import os
+import time
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy as np
+
+# 헤더: int64 [매직, 형식 버전, 시퀀스, 레이아웃 JSON 길이, 데이터 시작 위치, 게시 프로세스 PID, 예약 x2]
+MAGIC = 0x48525354415445  # 'HRSTATE'
+LAYOUT_VERSION = 1
+HEADER_WORDS = 8
+# 데이터 영역 정렬 단위 (bytes)
+ALIGNMENT = 64
+
+# 게시하는 링 버퍼 (이름, 시뮬레이션 속성)
+BUFFER_FIELDS = (('time', 'time_window'), ('human', 'human_data'), ('robot', 'robot_data'),
+                 ('ready', 'ready_data'))
+
+def _aligned(offset):
+    """ALIGNMENT 배수로 올림"""
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+def _attach(name):
+    """기존 공유 메모리 연결 (읽기 측이 종료할 때 세그먼트가 삭제되지 않도록)"""
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        pass
+    # Python 3.13 미만: 연결도 resource_tracker에 등록되어 종료 시 세그먼트가 삭제됨.
+    # 게시 프로세스 자신을 제외하면 항상 등록 해제 (게시 측 등록은 close()에서 복구)
+    shm = shared_memory.SharedMemory(name=name)
+    creator = int(np.ndarray(HEADER_WORDS, dtype=np.int64, buffer=shm.buf)[5])
+    if creator != os.getpid():
+        resource_tracker.unregister(shm._name, 'shared_memory')
+    return shm
+
+def _field_views(buffer, layout):
+    """레이아웃의 필드별 numpy 뷰"""
+    return {field['name']: np.ndarray(field['shape'], dtype=field['dtype'], buffer=buffer, offset=field['offset'])
+            for field in layout['fields']}
+
+def _chronological(views, layout):
+    """이중 기록 링 버퍼 저장소와 (head, size)에서 시간순 뷰 구성 (복사 없음)"""
+    result = {}
+    for name, _ in BUFFER_FIELDS:
+        head, size = (int(value) for value in views[f'{name}_state'])
+        end = head + layout['capacity']
+        result[name] = views[name][end - size:end]
+    return result
+
+class SharedStatePublisher:
+    """시뮬레이션 상태 공유 메모리 게시기 (틱 리스너)
+
+    세그먼트는 헤더, 레이아웃 JSON, 데이터 영역으로 구성된다. 데이터 영역에는 링
+    버퍼의 이중 기록 저장소와 (head, size), 현재 로봇 각도 등 틱 상태를 그대로
+    복사한다. 쓰기 전후로 시퀀스를 증가시키는 시퀀스 락 (홀수 = 쓰는 중)을 사용하므로
+    읽기 측은 잠금 없이 시퀀스가 바뀌지 않았는지로 일관된 상태를 확인한다.
+    """
+
+    def __init__(self, simulation, name=None):
+        self.simulation = simulation
+        sources = self._sources(simulation)
+
+        fields, offset = [], 0
+        for field_name, array in sources:
+            fields.append({'name': field_name, 'dtype': array.dtype.str, 'shape': list(array.shape),
+                           'offset': offset})
+            offset = _aligned(offset + array.nbytes)
+        self.layout = {
+            'capacity': simulation.window_size,
+            'method_names': list(simulation.method_names),
+            'joint_names': list(simulation.model.joint_names),
+            'fields': fields
+        }
+
+        layout_bytes = json.dumps(self.layout).encode()
+        data_offset = _aligned(HEADER_WORDS * 8 + len(layout_bytes))
+        self.shm = shared_memory.SharedMemory(name=name, create=True, size=data_offset + max(offset, 1))
+        self.name = self.shm.name
+
+        self.header = np.ndarray(HEADER_WORDS, dtype=np.int64, buffer=self.shm.buf)
+        self.header[:] = (MAGIC, LAYOUT_VERSION, 0, len(layout_bytes), data_offset, os.getpid(), 0, 0)
+        self.shm.buf[HEADER_WORDS * 8:HEADER_WORDS * 8 + len(layout_bytes)] = layout_bytes
+        self.views = _field_views(self.shm.buf[data_offset:], self.layout)
+        self.publish()
+
+        simulation.add_tick_listener(self)
+
+    @staticmethod
+    def _sources(simulation):
+        """게시할 (필드 이름, 원본 배열) 목록 (틱마다 같은 모양)"""
+        sources = []
+        for field_name, attribute in BUFFER_FIELDS:
+            data, state = getattr(simulation, attribute).state_arrays()
+            sources += [(field_name, data), (f'{field_name}_state', state)]
+        clock = np.array([simulation.current_time, simulation.dt, simulation.tick_count], dtype=np.float64)
+        sources += [('clock', clock),
+                    ('current_robot_angles', np.asarray(simulation.current_robot_angles, dtype=np.float64)),
+                    ('staleness', simulation.staleness),
+                    ('target_reachable', simulation.target_reachable)]
+        return sources
+
+    @property
+    def sequence(self):
+        """게시 시퀀스 (짝수 = 안정, 게시 1회당 2 증가)"""
+        return int(self.header[2])
+
+    def __call__(self, simulation):
+        """틱 콜백: 최신 상태 게시"""
+        self.publish()
+
+    def publish(self):
+        """시퀀스 락 안에서 모든 필드 복사"""
+        self.header[2] += 1  # 홀수: 쓰는 중
+        for field_name, array in self._sources(self.simulation):
+            np.copyto(self.views[field_name], array)
+        self.header[2] += 1  # 짝수: 완료
+
+    @property
+    def nbytes(self):
+        """공유 메모리 세그먼트 크기 (bytes)"""
+        return self.shm.size
+
+    def close(self):
+        """게시 중단 후 세그먼트 해제 및 삭제 (이미 삭제된 세그먼트도 허용)"""
+        if self in self.simulation.tick_listeners:
+            self.simulation.tick_listeners.remove(self)
+        self.header = None
+        self.views = None
+        self.shm.close()
+        # 추적기를 공유하는 자식 프로세스의 읽기 측이 등록을 해제했을 수 있으므로 다시 등록
+        # (같은 이름은 한 번만 기록됨) 후 삭제
+        resource_tracker.register(self.shm._name, 'shared_memory')
+        try:
+            self.shm.unlink()
+        except FileNotFoundError:
+            resource_tracker.unregister(self.shm._name, 'shared_memory')
+
+class SharedStateReader:
+    """다른 프로세스에서 게시된 시뮬레이션 상태 읽기 (잠금 없음)"""
+
+    def __init__(self, name):
+        self.shm = _attach(name)
+        self.header = np.ndarray(HEADER_WORDS, dtype=np.int64, buffer=self.shm.buf)
+        if self.header[0] != MAGIC or self.header[1] != LAYOUT_VERSION:
+            self.shm.close()
+            raise ValueError(f"Shared memory segment {name} is not a simulation state segment")
+
+        layout_size, data_offset = int(self.header[3]), int(self.header[4])
+        self.layout = json.loads(bytes(self.shm.buf[HEADER_WORDS * 8:HEADER_WORDS * 8 + layout_size]))
+        self.method_names = self.layout['method_names']
+        self.joint_names = self.layout['joint_names']
+        self._data = np.ndarray(self.shm.size - data_offset, dtype=np.uint8, buffer=self.shm.buf,
+                                offset=data_offset)
+        self.views = _field_views(self._data, self.layout)
+        # 일관된 복사본을 담을 로컬 버퍼 (읽을 때마다 재사용)
+        self._copy = np.empty_like(self._data)
+        self._copy_views = _field_views(self._copy, self.layout)
+
+    @property
+    def sequence(self):
+        """현재 게시 시퀀스"""
+        return int(self.header[2])
+
+    def read(self, timeout=1.0):
+        """일관된 상태 복사본 (데이터 영역을 한 번 복사 후 시퀀스 검증, 쓰는 중이면 재시도)
+
+        반환값: 시간순 버퍼 (time, human, robot, ready)와 틱 상태를 담은 딕셔너리.
+        배열은 다음 read() 호출 때 덮어쓰이는 내부 버퍼의 뷰이다.
+        """
+        deadline = time.perf_counter() + timeout
+        while True:
+            before = self.header[2]
+            if before % 2 == 0:
+                np.copyto(self._copy, self._data)
+                if self.header[2] == before:
+                    return self._state(self._copy_views, int(before))
+            if time.perf_counter() > deadline:
+                raise TimeoutError("Could not read a consistent simulation state")
+
+    def view(self):
+        """복사 없이 공유 메모리를 직접 가리키는 상태와 시퀀스
+
+        사용 후 is_valid(sequence)가 참이어야 그 사이 값이 일관되었음이 보장된다.
+        """
+        sequence = self.sequence
+        return self._state(self.views, sequence), sequence
+
+    def is_valid(self, sequence):
+        """sequence 이후 게시가 없었는지 (쓰는 중 시퀀스는 항상 무효)"""
+        return sequence % 2 == 0 and self.sequence == sequence
+
+    def wait(self, sequence, timeout=1.0, interval=0.001):
+        """sequence 이후 새 게시가 완료될 때까지 대기 (새 시퀀스 반환, 시간 초과 시 None)"""
+        deadline = time.perf_counter() + timeout
+        while time.perf_counter() < deadline:
+            current = self.sequence
+            if current != sequence and current % 2 == 0:
+                return current
+            time.sleep(interval)
+        return None
+
+    def _state(self, views, sequence):
+        """필드 뷰에서 상태 딕셔너리 구성"""
+        current_time, dt, tick_count = views['clock']
+        state = _chronological(views, self.layout)
+        state.update(current_time=float(current_time), dt=float(dt), tick_count=int(tick_count),
+                     current_robot_angles=views['current_robot_angles'], staleness=views['staleness'],
+                     target_reachable=views['target_reachable'], sequence=sequence)
+        return state
+
+    def close(self):
+        """세그먼트 연결 해제 (삭제는 게시 측 담당)"""
+        self.header = None
+        self.views = None
+        self._data = None
+        self.shm.close()
+
+def follow(name, duration=2.0):
+    """다른 프로세스에서 게시 상태를 duration 초 동안 추적하며 일관성 검사 (예제/진단용)
+
+    반환값: 읽은 횟수, 관측한 틱 수, 불일치 (최신 시간 샘플 + dt != 현재 시간) 수
+    """
+    reader = SharedStateReader(name)
+    reads, ticks, inconsistent = 0, set(), 0
+    sequence = reader.sequence
+    deadline = time.perf_counter() + duration
+    while time.perf_counter() < deadline:
+        sequence = reader.wait(sequence, timeout=deadline - time.perf_counter())
+        if sequence is None:
+            break
+        state = reader.read()
+        reads += 1
+        ticks.add(state['tick_count'])
+        if len(state['time']) and not np.isclose(state['time'][-1] + state['dt'], state['current_time']):
+            inconsistent += 1
+    reader.close()
+    return {'reads': reads, 'ticks': len(ticks), 'inconsistent': inconsistent}
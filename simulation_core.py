@@ -3,58 +3,195 @@ Human-Robot Trajectory Control Simulation Core
 핵심 시뮬레이션 로직을 담당하는 모듈
 """
 
+import copy
+import time
 import numpy as np
-from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from scipy.integrate import simpson
+from scipy.linalg import solve_discrete_are
+
+from robot_model import RobotModel
+from evaluation import evaluate_tracking
+from workspace import RobotWorkspace
+from inverse_kinematics import InverseKinematicsSolver
+
+# 저장 자료형 정책: 이력 버퍼/녹화는 저장 자료형, 적분 상태와 피팅/지표 누적은 float64
+DTYPE_POLICIES = {'float64': np.float64, 'float32': np.float32, 'compact': np.float32}
+
+def storage_dtype(dtype):
+    """저장 자료형 정규화 (정책 이름 또는 numpy 실수 자료형)"""
+    if isinstance(dtype, str):
+        dtype = DTYPE_POLICIES.get(dtype, dtype)
+    dtype = np.dtype(dtype)
+    if dtype.kind != 'f':
+        raise ValueError(f"Unsupported storage dtype: {dtype}")
+    return dtype
+
+def rng_state_words(rng):
+    """PCG64 난수 생성기 상태를 uint64 배열 (6,)로 변환 (스냅샷용)"""
+    state = rng.bit_generator.state
+    if state['bit_generator'] != 'PCG64':
+        raise TypeError(f"Unsupported bit generator for snapshots: {state['bit_generator']}")
+    mask = (1 << 64) - 1
+    value, increment = state['state']['state'], state['state']['inc']
+    return np.array([value >> 64, value & mask, increment >> 64, increment & mask,
+                     state['has_uint32'], state['uinteger']], dtype=np.uint64)
+
+def set_rng_state_words(rng, words):
+    """rng_state_words 배열로 PCG64 난수 생성기 상태 복원"""
+    words = [int(word) for word in words]
+    rng.bit_generator.state = {
+        'bit_generator': 'PCG64',
+        'state': {'state': (words[0] << 64) | words[1], 'inc': (words[2] << 64) | words[3]},
+        'has_uint32': words[4],
+        'uinteger': words[5]
+    }
+
+class RingBuffer:
+    """고정 크기 링 버퍼 (복사 없이 시간순 연속 뷰 제공)"""
+    
+    __slots__ = ('capacity', '_data', '_head', '_size')
+    
+    def __init__(self, capacity, shape=(), dtype=np.float64):
+        self.capacity = capacity
+        # 각 샘플을 두 번 기록하여 항상 연속된 슬라이스로 읽을 수 있게 함
+        self._data = np.zeros((2 * capacity,) + tuple(shape), dtype=dtype)
+        self._head = 0  # 다음 쓰기 위치
+        self._size = 0
+        
+    def __len__(self):
+        return self._size
+    
+    @property
+    def dtype(self):
+        return self._data.dtype
+    
+    @property
+    def nbytes(self):
+        """저장 공간 크기 (bytes)"""
+        return self._data.nbytes
+    
+    def append(self, value):
+        """샘플 추가 (가장 오래된 샘플을 덮어씀)"""
+        self._data[self._head] = value
+        self._data[self._head + self.capacity] = value
+        self._head = (self._head + 1) % self.capacity
+        if self._size < self.capacity:
+            self._size += 1
+    
+    def view(self):
+        """시간순으로 정렬된 데이터 뷰 반환 (복사 없음)"""
+        end = self._head + self.capacity
+        return self._data[end - self._size:end]
+    
+    def last(self):
+        """가장 최근 샘플 반환"""
+        return self._data[self._head - 1 + self.capacity]
+    
+    def clear(self):
+        """버퍼 초기화"""
+        self._head = 0
+        self._size = 0
+    
+    def load(self, values):
+        """시간순 배열로 버퍼 내용 교체 (용량보다 길면 최근 샘플만 유지)"""
+        values = values[len(values) - min(len(values), self.capacity):]
+        self._size = len(values)
+        self._head = self._size % self.capacity
+        self._data[:self._size] = values
+        self._data[self.capacity:self.capacity + self._size] = values
+    
+    def state_arrays(self):
+        """스냅샷용 상태 배열 목록"""
+        return [self._data, np.array([self._head, self._size], dtype=np.int64)]
+    
+    def load_state(self, arrays):
+        """state_arrays 순서의 배열 반복자에서 상태 복원"""
+        np.copyto(self._data, next(arrays))
+        self._head, self._size = (int(value) for value in next(arrays))
+
+# 관절별 인간 동작 모델: (오프셋, [(진폭, 각주파수, 'sin' | 'cos'), ...])
+DEFAULT_MOTION_TERMS = {
+    # 어깨: 천천히 위아래 움직임
+    'shoulder': (0, [(30, 0.5, 'sin'), (15, 0.3, 'sin')]),
+    # 팔꿈치: 주기적인 굽힘/펴짐
+    'elbow': (45, [(30, 0.8, 'sin'), (10, 0.6, 'cos')]),
+    # 손목: 작은 회전 움직임
+    'wrist': (0, [(20, 1.2, 'sin'), (5, 0.9, 'cos')])
+}
 
 class HumanMotionSensor:
     """인간 동작 센서 시뮬레이터"""
     
-    def __init__(self):
+    def __init__(self, model=None, motion_terms=None, seed=None):
+        self.model = model if model is not None else RobotModel.default()
         self.is_running = False
-        self.joint_angles = {
-            'shoulder': 0.0,
-            'elbow': 0.0,
-            'wrist': 0.0
-        }
+        self.joint_angles = dict.fromkeys(self.model.joint_names, 0.0)
         self.noise_level = 0.05  # 센서 노이즈 레벨
+        # 센서 전용 난수 생성기 (seed: 정수, Generator 또는 None)
+        self.rng = np.random.default_rng(seed)
+        self._build_motion_table(motion_terms or DEFAULT_MOTION_TERMS)
         
-    def simulate_human_motion(self, t):
-        """사람의 자연스러운 팔 움직임 시뮬레이션"""
-        # 어깨: 천천히 위아래 움직임
-        shoulder = 30 * np.sin(0.5 * t) + 15 * np.sin(0.3 * t)
+    def _build_motion_table(self, motion_terms):
+        """동작 모델을 (관절, 항) 배열로 변환"""
+        rows = []
+        for i, name in enumerate(self.model.joint_names):
+            # 정의되지 않은 관절은 관절마다 주파수가 다른 단일 사인파 사용
+            rows.append(motion_terms.get(name, (0, [(20, 0.4 + 0.2 * i, 'sin')])))
         
-        # 팔꿈치: 주기적인 굽힘/펴짐
-        elbow = 45 + 30 * np.sin(0.8 * t) + 10 * np.cos(0.6 * t)
+        n_terms = max(len(terms) for _, terms in rows)
+        shape = (self.model.n_joints, n_terms)
+        self.motion_offsets = np.array([offset for offset, _ in rows], dtype=float)
+        self.motion_amplitudes = np.zeros(shape)
+        self.motion_frequencies = np.zeros(shape)
+        self.motion_phases = np.zeros(shape)
         
-        # 손목: 작은 회전 움직임
-        wrist = 20 * np.sin(1.2 * t) + 5 * np.cos(0.9 * t)
+        for i, (_, terms) in enumerate(rows):
+            for k, (amplitude, frequency, kind) in enumerate(terms):
+                self.motion_amplitudes[i, k] = amplitude
+                self.motion_frequencies[i, k] = frequency
+                # cos(x) = sin(x + pi/2)
+                self.motion_phases[i, k] = np.pi / 2 if kind == 'cos' else 0.0
+        
+    def sample(self, t):
+        """관절 각도 배열 반환: 스칼라 t -> (J,), 배열 t -> (..., J)"""
+        phase = np.multiply.outer(t, self.motion_frequencies) + self.motion_phases
+        angles = self.motion_offsets + np.sum(self.motion_amplitudes * np.sin(phase), axis=-1)
         
         # 노이즈 추가 (실제 센서의 불완전함 시뮬레이션)
-        shoulder += np.random.normal(0, self.noise_level * abs(shoulder))
-        elbow += np.random.normal(0, self.noise_level * abs(elbow))
-        wrist += np.random.normal(0, self.noise_level * abs(wrist))
+        angles = angles + self.rng.normal(0, self.noise_level * np.abs(angles))
+        return angles
+    
+    def state_arrays(self):
+        """스냅샷용 상태 배열 목록 (난수 생성기 상태, 노이즈 레벨)"""
+        return [rng_state_words(self.rng), np.array([self.noise_level])]
+    
+    def load_state(self, arrays):
+        """state_arrays 순서의 배열 반복자에서 상태 복원"""
+        set_rng_state_words(self.rng, next(arrays))
+        self.noise_level = float(next(arrays)[0])
         
-        return shoulder, elbow, wrist
+    def simulate_human_motion(self, t):
+        """사람의 자연스러운 팔 움직임 시뮬레이션 (관절별 값 튜플)"""
+        return tuple(np.moveaxis(self.sample(t), -1, 0))
     
     def get_current_angles(self, t):
         """현재 시간의 관절 각도 반환"""
-        shoulder, elbow, wrist = self.simulate_human_motion(t)
-        
-        self.joint_angles = {
-            'shoulder': shoulder,
-            'elbow': elbow,
-            'wrist': wrist
-        }
-        
+        self.joint_angles = self.model.to_dict(self.sample(t))
         return self.joint_angles
 
 class TrigonometricSpline:
     """삼각함수 기반 스플라인 곡선 생성기"""
     
-    def __init__(self, n_harmonics=3):
+    __slots__ = ('n_harmonics', 'coefficients', 'coeff_matrix', 'omega', 'dtype')
+    
+    def __init__(self, n_harmonics=3, dtype=np.float64):
         self.n_harmonics = n_harmonics  # 조화파 개수
         self.coefficients = {}
+        # 배치 피팅 결과: (1 + 2 * n_harmonics, ...) 계수 행렬 (저장 자료형)
+        self.coeff_matrix = None
+        self.omega = 1.0
+        self.dtype = storage_dtype(dtype)
         
     def fit(self, t_data, angle_data, joint_name):
         """시간-각도 데이터에 삼각함수 스플라인 피팅"""
@@ -140,37 +277,342 @@ class TrigonometricSpline:
         
         return result
 
+    def basis(self, t, omega, order=0):
+        """삼각함수 기저 (또는 order 차 도함수) 행렬: t (...) -> (..., 1 + 2 * n_harmonics)"""
+        t = np.asarray(t, dtype=float)
+        k_omega = np.arange(1, self.n_harmonics + 1) * omega
+        # d^n/dt^n cos(x) = cos(x + n*pi/2), d^n/dt^n sin(x) = sin(x + n*pi/2)
+        phase = np.multiply.outer(t, k_omega) + order * np.pi / 2
+        scale = k_omega ** order
+        
+        A = np.zeros(t.shape + (1 + 2 * self.n_harmonics,))
+        if order == 0:
+            A[..., 0] = 1  # 상수항
+        A[..., 1::2] = scale * np.cos(phase)
+        A[..., 2::2] = scale * np.sin(phase)
+        return A
+    
+    @staticmethod
+    def window_omega(t_data):
+        """기본 주파수 계산 (데이터 길이 기반)"""
+        T = t_data[-1] - t_data[0]
+        return 2 * np.pi / max(T, 1)
+    
+    def fit_batch(self, t_data, angle_data, basis=None):
+        """여러 관절을 공유 기저로 한 번에 피팅 (angle_data: (N, ...))
+        
+        basis: 미리 계산된 (기저 행렬, omega) 튜플 (여러 방법이 공유할 때)
+        """
+        if len(t_data) < 2:
+            return
+        
+        if basis is None:
+            omega = self.window_omega(t_data)
+            A = self.basis(t_data, omega)
+        else:
+            A, omega = basis
+        Y = np.asarray(angle_data).reshape(len(t_data), -1)
+        try:
+            # float32 입력도 float64 기저와 함께 배정밀도로 풀림
+            coeffs = np.linalg.lstsq(A, Y, rcond=None)[0]
+        except np.linalg.LinAlgError:
+            coeffs = np.zeros((A.shape[1], Y.shape[1]))
+        
+        coeffs = coeffs.astype(self.dtype, copy=False)
+        self.coeff_matrix = coeffs.reshape((A.shape[1],) + np.shape(angle_data)[1:])
+        self.omega = omega
+    
+    def predict_batch(self, t, order=0):
+        """배치 피팅 결과로 모든 관절의 각도(또는 도함수) 예측"""
+        if self.coeff_matrix is None:
+            return 0.0
+        return np.tensordot(self.basis(t, self.omega, order), self.coeff_matrix, axes=1)
+
+class SlidingDFTFitter:
+    """균일 샘플링 창의 스플라인 계수를 슬라이딩 DFT로 갱신하는 피팅 백엔드
+    
+    창 길이와 샘플 간격이 일정하면 omega도 고정되므로, 최소제곱의 우변 A^T y는
+    조화파별 DFT 빈 sum y * exp(i k omega t)이 된다. 빈은 절대 시간 기준으로 저장해
+    창이 한 샘플 밀릴 때 새 샘플을 더하고 빠진 샘플을 빼는 O(n_harmonics) 갱신만 한다.
+    피팅 시 빈을 창 시작 시각 t0 기준으로 회전 (k omega t0)하고, 상대 시간 기저의 미리
+    계산한 그람 역행렬을 곱한 뒤 다시 절대 시간 계수로 회전하므로 lstsq 결과와 같다.
+    창이 채워지는 중 (길이가 capacity 미만), 비균일 샘플링, 연속되지 않은 창, 정규방정식
+    조건수가 max_condition 이상인 창 (기본 주기보다 짧은 창 등)에서는 lstsq (fit_batch)로
+    대체한다.
+    """
+    
+    __slots__ = ('n_harmonics', 'shape', 'capacity', 'tolerance', 'resync_interval', 'max_condition', '_bins',
+                 '_size', '_step', '_omega', '_gram_key', '_gram_inv', '_first_time', '_first_values',
+                 '_last_time', '_updates', 'sliding_fits', 'fallback_fits')
+    
+    def __init__(self, n_harmonics=3, shape=(), capacity=None, tolerance=1e-6, resync_interval=1000,
+                 max_condition=1e8):
+        self.n_harmonics = n_harmonics
+        self.shape = tuple(shape)  # 샘플 하나의 모양 (예: (관절,))
+        self.capacity = capacity  # 창 버퍼 용량 (None이면 항상 lstsq)
+        self.tolerance = tolerance  # 샘플 간격 허용 오차 (간격 대비 비율)
+        self.max_condition = max_condition  # 그람 행렬 조건수 상한
+        # 누적 반올림 오차를 제한하기 위해 이 횟수만큼 갱신 후 빈을 다시 계산
+        self.resync_interval = resync_interval
+        self.sliding_fits = 0
+        self.fallback_fits = 0
+        self.reset()
+        
+    def reset(self):
+        """빈 무효화 (다음 피팅에서 창 전체로 재계산)"""
+        self._bins = None
+        self._size = 0
+        self._step = 0.0
+        self._omega = 0.0
+        self._gram_key = None
+        self._gram_inv = None
+        self._first_time = np.nan
+        self._first_values = np.zeros(int(np.prod(self.shape)))
+        self._last_time = np.nan
+        self._updates = 0
+        
+    def _phasors(self, t):
+        """exp(i k omega t), k = 0..n_harmonics: t (...) -> (..., n_harmonics + 1)"""
+        return np.exp(1j * self._omega * np.multiply.outer(t, np.arange(self.n_harmonics + 1)))
+    
+    def update(self, t_data, angle_data):
+        """틱마다 현재 창 전달: 직전 창에서 한 샘플 밀린 균일 창이면 빈을 증분 갱신"""
+        n = len(t_data)
+        if n == 0:
+            return
+        if (self._bins is not None and n == self._size and n > 1 and t_data[-2] == self._last_time
+                and abs(t_data[-1] - t_data[-2] - self._step) <= self.tolerance * self._step
+                and self._updates < self.resync_interval):
+            added = self._phasors(t_data[-1])[:, None] * np.asarray(angle_data[-1], dtype=float).reshape(1, -1)
+            removed = self._phasors(self._first_time)[:, None] * self._first_values
+            self._bins += added - removed
+            self._updates += 1
+        else:
+            self._bins = None
+        self._last_time = float(t_data[-1])
+        self._first_time = float(t_data[0])
+        self._first_values[:] = np.asarray(angle_data[0], dtype=float).reshape(-1)
+    
+    def _prepare(self, t_data, angle_data):
+        """창 전체로 빈과 상대 시간 그람 역행렬 계산 (슬라이딩 갱신이 불가능한 창이면 False)"""
+        n = len(t_data)
+        # 채우는 중에는 창 길이와 omega가 매 틱 바뀌므로 가득 찬 창만 사용
+        if n != self.capacity or n < 2:
+            return False
+        step = (t_data[-1] - t_data[0]) / (n - 1)
+        if step <= 0 or np.max(np.abs(np.diff(t_data) - step)) > self.tolerance * step:
+            return False
+        
+        spline = TrigonometricSpline(self.n_harmonics)
+        omega = spline.window_omega(t_data)
+        key = np.array([n, step, omega])
+        if self._gram_key is None or not np.allclose(key, self._gram_key, rtol=1e-9, atol=0):
+            # 그람 역행렬 (또는 조건수가 커서 사용 불가 판정)을 창 구성별로 한 번만 계산
+            A = spline.basis(np.arange(n) * step, omega)
+            gram = A.T @ A
+            self._gram_inv = np.linalg.inv(gram) if np.linalg.cond(gram) < self.max_condition else None
+            self._gram_key = key
+        if self._gram_inv is None:
+            return False
+        self._size, self._step, self._omega = n, step, omega
+        
+        Y = np.asarray(angle_data, dtype=float).reshape(n, -1)
+        self._bins = self._phasors(np.asarray(t_data, dtype=float)).T @ Y
+        self._updates = 0
+        self._last_time = float(t_data[-1])
+        self._first_time = float(t_data[0])
+        self._first_values[:] = Y[0]
+        return True
+    
+    def fit(self, spline, t_data, angle_data):
+        """현재 창 (update로 전달한 창과 같아야 함)의 계수를 spline에 설정"""
+        if self._bins is None and not self._prepare(t_data, angle_data):
+            self.fallback_fits += 1
+            spline.fit_batch(t_data, angle_data)
+            return
+        
+        # 창 시작 시각 기준 상대 빈 -> A_rel^T y
+        t0 = self._first_time
+        relative = self._bins * np.exp(-1j * self._omega * t0 * np.arange(self.n_harmonics + 1))[:, None]
+        rhs = np.empty((1 + 2 * self.n_harmonics, relative.shape[1]))
+        rhs[0] = relative[0].real
+        rhs[1::2] = relative[1:].real
+        rhs[2::2] = relative[1:].imag
+        relative_coeffs = self._gram_inv @ rhs
+        
+        # 상대 시간 계수 -> 절대 시간 계수: (a - ib) = (a' - ib') exp(-i k omega t0)
+        rotation = np.exp(-1j * self._omega * t0 * np.arange(1, self.n_harmonics + 1))[:, None]
+        z = (relative_coeffs[1::2] - 1j * relative_coeffs[2::2]) * rotation
+        coeffs = np.empty_like(relative_coeffs)
+        coeffs[0] = relative_coeffs[0]
+        coeffs[1::2] = z.real
+        coeffs[2::2] = -z.imag
+        
+        spline.coeff_matrix = coeffs.astype(spline.dtype, copy=False).reshape(
+            (len(coeffs),) + np.shape(angle_data)[1:])
+        spline.omega = self._omega
+        self.sliding_fits += 1
+    
+    def state_arrays(self):
+        """스냅샷용 상태 배열 목록 (모양은 조화파 개수와 샘플 모양으로 고정)"""
+        n_coeffs = 1 + 2 * self.n_harmonics
+        bins = np.zeros((self.n_harmonics + 1, len(self._first_values)), dtype=complex)
+        gram_inv = np.zeros((n_coeffs, n_coeffs))
+        if self._bins is not None:
+            bins[:] = self._bins
+        if self._gram_inv is not None:
+            gram_inv[:] = self._gram_inv
+        counters = np.array([self._bins is not None, self._gram_inv is not None, self._size, self._step,
+                             self._omega, self._first_time, self._last_time, self._updates,
+                             self.sliding_fits, self.fallback_fits])
+        return [bins, gram_inv, self._first_values, counters]
+    
+    def load_state(self, arrays):
+        """state_arrays 순서의 배열 반복자에서 상태 복원"""
+        bins, gram_inv = next(arrays), next(arrays)
+        np.copyto(self._first_values, next(arrays))
+        (has_bins, has_gram, size, self._step, self._omega, self._first_time, self._last_time,
+         updates, sliding_fits, fallback_fits) = next(arrays)
+        self._bins = np.array(bins) if has_bins else None
+        self._gram_inv = np.array(gram_inv) if has_gram else None
+        self._gram_key = np.array([size, self._step, self._omega]) if has_gram else None
+        self._size, self._updates = int(size), int(updates)
+        self.sliding_fits, self.fallback_fits = int(sliding_fits), int(fallback_fits)
+
+class AlphaBetaGammaFilter:
+    """알파-베타-감마 필터 (정상상태 등가속도 칼만 필터, 관절별 벡터화)"""
+    
+    __slots__ = ('shape', 'dt', 'gains', 'position', 'velocity', 'acceleration', 'initialized')
+    
+    def __init__(self, shape, dt, process_noise=100.0, measurement_noise=2.0):
+        self.shape = shape if isinstance(shape, tuple) else (shape,)
+        self.dt = dt
+        # 정상상태 칼만 이득 [위치, 속도, 가속도] (관절마다 동일)
+        self.gains = self.steady_state_gains(dt, process_noise, measurement_noise)
+        self.reset()
+        
+    @staticmethod
+    def steady_state_gains(dt, process_noise, measurement_noise):
+        """등가속도 모델의 정상상태 칼만 이득 계산
+        
+        process_noise: 구간별 일정 저크의 표준편차 (deg/s^3)
+        measurement_noise: 측정 노이즈 표준편차 (deg)
+        """
+        F = np.array([[1, dt, dt**2 / 2],
+                      [0, 1, dt],
+                      [0, 0, 1]])
+        H = np.array([[1.0, 0.0, 0.0]])
+        G = np.array([[dt**3 / 6], [dt**2 / 2], [dt]])
+        Q = process_noise**2 * G @ G.T
+        R = np.array([[measurement_noise**2]])
+        
+        # 예측 공분산의 이산 리카티 방정식 해
+        P = solve_discrete_are(F.T, H.T, Q, R)
+        return (P @ H.T / (H @ P @ H.T + R)).ravel()
+    
+    def reset(self):
+        """필터 상태 초기화"""
+        self.position = np.zeros(self.shape)
+        self.velocity = np.zeros(self.shape)
+        self.acceleration = np.zeros(self.shape)
+        self.initialized = False
+    
+    def update(self, measurement):
+        """새 측정값으로 상태 갱신 (O(J))"""
+        if not self.initialized:
+            self.position = np.array(measurement, dtype=float)
+            self.initialized = True
+            return self.position
+        
+        dt = self.dt
+        # 예측
+        position = self.position + self.velocity * dt + 0.5 * self.acceleration * dt**2
+        velocity = self.velocity + self.acceleration * dt
+        
+        # 보정
+        residual = measurement - position
+        k_pos, k_vel, k_acc = self.gains
+        self.position = position + k_pos * residual
+        self.velocity = velocity + k_vel * residual
+        self.acceleration = self.acceleration + k_acc * residual
+        return self.position
+    
+    def state_arrays(self):
+        """스냅샷용 상태 배열 목록"""
+        return [self.position, self.velocity, self.acceleration, np.array([self.initialized])]
+    
+    def load_state(self, arrays):
+        """state_arrays 순서의 배열 반복자에서 상태 복원"""
+        self.position = np.array(next(arrays))
+        self.velocity = np.array(next(arrays))
+        self.acceleration = np.array(next(arrays))
+        self.initialized = bool(next(arrays)[0])
+    
+    def predict(self, horizon, order=0):
+        """horizon 초 후의 각도 (order=1: 각속도, 2: 각가속도) 예측"""
+        if order == 1:
+            return self.velocity + self.acceleration * horizon
+        if order == 2:
+            return self.acceleration
+        return self.position + self.velocity * horizon + 0.5 * self.acceleration * horizon**2
+
 class RobotTrajectoryController:
     """로봇 궤적 제어기"""
     
-    def __init__(self):
-        self.joint_limits = {
-            'shoulder': (-90, 90),
-            'elbow': (0, 150),
-            'wrist': (-60, 60)
-        }
-        self.velocity_limits = {
-            'shoulder': 50,  # deg/s
-            'elbow': 80,
-            'wrist': 100
-        }
-        self.scaling_factors = {
-            'shoulder': 0.8,  # 인간-로봇 크기 차이 보정
-            'elbow': 0.9,
-            'wrist': 1.0
-        }
+    def __init__(self, model=None):
+        self.model = model if model is not None else RobotModel.default()
+        # 끝점 공간 매핑용 역기구학 (초기값은 호출 시 현재 로봇 자세로 전달)
+        self.ik = InverseKinematicsSolver(self.model)
+    
+    @property
+    def joint_limits(self):
+        return {name: (lo, hi) for name, lo, hi in
+                zip(self.model.joint_names, self.model.lower_limits, self.model.upper_limits)}
+    
+    @property
+    def velocity_limits(self):
+        return self.model.to_dict(self.model.velocity_limits)  # deg/s
+    
+    @property
+    def scaling_factors(self):
+        return self.model.to_dict(self.model.scaling_factors)  # 인간-로봇 크기 차이 보정
+    
+    def map_angles(self, human_angles):
+        """인간 관절 각도 배열 (..., J)을 로봇 관절 각도 배열로 변환"""
+        # 스케일링 후 관절 한계 적용
+        return np.clip(human_angles * self.model.scaling_factors,
+                       self.model.lower_limits, self.model.upper_limits)
+    
+    def hand_pose(self, human_angles):
+        """인간 관절 각도 (..., J) -> 로봇 좌표계의 손 위치 (..., 2)와 손목 방향 (...,) [deg]"""
+        human_angles = np.asarray(human_angles, dtype=float)
+        return self.model.forward_kinematics(human_angles)[..., -1, :], np.sum(human_angles, axis=-1)
+    
+    def map_cartesian(self, human_angles, initial=None):
+        """인간 손 위치/방향을 로봇 끝점 목표로 두고 역기구학으로 관절 각도 계산 (관절 한계 적용)"""
+        position, orientation = self.hand_pose(human_angles)
+        return self.ik.solve(position, orientation, initial=initial)[0]
+    
+    def map_targets(self, human_angles, mapping='joint', initial=None):
+        """매핑 방식별 변환: 'joint' (관절 각도 스케일링) 또는 'cartesian' (끝점 역기구학)"""
+        if mapping == 'cartesian':
+            return self.map_cartesian(human_angles, initial)
+        return self.map_angles(human_angles)
+    
+    def limit_velocity(self, current_angles, target_angles, dt=0.01):
+        """관절 각도 배열에 속도 제한 적용"""
+        max_change = self.model.max_step(dt)
+        return current_angles + np.clip(target_angles - current_angles, -max_change, max_change)
         
     def human_to_robot_mapping(self, human_angles):
         """인간 관절 각도를 로봇 관절 각도로 변환"""
         robot_angles = {}
         
         for joint, angle in human_angles.items():
-            # 스케일링 적용
-            scaled_angle = angle * self.scaling_factors[joint]
-            
-            # 관절 한계 적용
-            min_limit, max_limit = self.joint_limits[joint]
-            robot_angles[joint] = np.clip(scaled_angle, min_limit, max_limit)
+            i = self.model.joint_index[joint]
+            scaled_angle = angle * self.model.scaling_factors[i]
+            robot_angles[joint] = np.clip(scaled_angle, self.model.lower_limits[i],
+                                          self.model.upper_limits[i])
             
         return robot_angles
     
@@ -180,195 +622,718 @@ class RobotTrajectoryController:
         
         for joint in target_angles:
             if joint in current_angles:
-                angle_diff = target_angles[joint] - current_angles[joint]
-                max_change = self.velocity_limits[joint] * dt
-                
-                if abs(angle_diff) > max_change:
-                    limited_change = np.sign(angle_diff) * max_change
-                    limited_angles[joint] = current_angles[joint] + limited_change
-                else:
-                    limited_angles[joint] = target_angles[joint]
+                max_change = self.model.max_step(dt)[self.model.joint_index[joint]]
+                angle_diff = np.clip(target_angles[joint] - current_angles[joint],
+                                     -max_change, max_change)
+                limited_angles[joint] = current_angles[joint] + angle_diff
             else:
                 limited_angles[joint] = target_angles[joint]
                 
         return limited_angles
+    
+    def create_shaper(self, shape=None):
+        """속도/가속도/저크 제한 궤적 성형 단계 생성 (파이프라인마다 하나)"""
+        return TrajectoryShaper(self.model, shape)
+
+class TrajectoryShaper:
+    """속도/가속도/저크 제한 궤적 성형기 (관절별 상태 유지, 벡터화)"""
+    
+    __slots__ = ('model', 'shape', 'position', 'velocity', 'acceleration')
+    
+    def __init__(self, model, shape=None):
+        self.model = model
+        self.shape = shape if shape is not None else (model.n_joints,)
+        self.reset()
+        
+    def reset(self, position=None):
+        """상태 초기화 (위치 지정 가능, 속도/가속도는 0)"""
+        self.position = np.zeros(self.shape) if position is None else np.array(position, dtype=float)
+        self.velocity = np.zeros(self.shape)
+        self.acceleration = np.zeros(self.shape)
+    
+    def state_arrays(self):
+        """스냅샷용 상태 배열 목록"""
+        return [self.position, self.velocity, self.acceleration]
+    
+    def load_state(self, arrays):
+        """state_arrays 순서의 배열 반복자에서 상태 복원"""
+        self.position = np.array(next(arrays))
+        self.velocity = np.array(next(arrays))
+        self.acceleration = np.array(next(arrays))
+    
+    def update(self, target, dt, target_velocity=0.0, target_acceleration=0.0):
+        """목표 위치를 향해 한 주기 진행 후 제한된 위치 반환
+        
+        위치 오차는 가속도/저크 한계 내에서 정지 가능한 최대 속도로, 속도 오차는
+        저크 한계 내에서 도달 가능한 가속도로 변환하는 시간 최적 근사 방식.
+        target_velocity, target_acceleration은 target과 같은 시점 (이번 주기 끝)의
+        피드포워드 항 (예: 스플라인 도함수)
+        """
+        v_max = self.model.velocity_limits
+        a_max = self.model.acceleration_limits
+        j_max = self.model.jerk_limits
+        
+        # 위치 오차 -> 속도 명령: 제동 거리 v^2/(2a) + v*(a/(2j) + dt) = |e| 를 만족하는 속도
+        # (a/(2j): 가속도 전환 지연, dt: 한 주기 명령 지연)
+        braking_lag = a_max * (a_max / (2 * j_max) + dt)
+        
+        def braking_speed(distance):
+            return np.minimum(np.sqrt(braking_lag**2 + 2 * a_max * distance) - braking_lag, distance / dt)
+        
+        # 목표는 이번 주기 끝 시점 값이고 피드포워드가 한 주기 이동분 (v dt)을 담당하므로
+        # 보정은 현재 시점 기준 목표 (target - v dt)와의 오차로 계산 (이중 반영 방지)
+        error = target - target_velocity * dt - self.position
+        velocity_cmd = target_velocity + np.sign(error) * braking_speed(np.abs(error))
+        
+        # 관절 한계도 같은 제동 속도로 접근해 한계 앞에서 가속도/저크 한계 내로 정지
+        upper_speed = braking_speed(np.maximum(self.model.upper_limits - self.position, 0))
+        lower_speed = braking_speed(np.maximum(self.position - self.model.lower_limits, 0))
+        velocity_cmd = np.clip(velocity_cmd, -np.minimum(lower_speed, v_max), np.minimum(upper_speed, v_max))
+        
+        # 속도 오차 -> 가속도 명령: 이번 주기 적용 후 저크 한계로 가속도를 0까지
+        # 줄이는 동안의 속도 증가분 (a*dt + a^2/(2j))이 오차를 넘지 않는 크기
+        max_jerk_step = j_max * dt
+        # 속도도 같은 방식: 가속도 피드포워드의 한 주기 변화분 (a dt)을 뺀 속도와의 오차
+        velocity_error = velocity_cmd - target_acceleration * dt - self.velocity
+        accel_cmd = target_acceleration + np.sign(velocity_error) * (
+            np.sqrt(max_jerk_step**2 + 2 * j_max * np.abs(velocity_error)) - max_jerk_step)
+        
+        # 같은 조건으로 속도 한계 보호 (피드포워드가 있어도 한계 초과 방지)
+        accel_upper = np.sqrt(max_jerk_step**2 + 2 * j_max * np.maximum(v_max - self.velocity, 0)) - max_jerk_step
+        accel_lower = max_jerk_step - np.sqrt(max_jerk_step**2 + 2 * j_max * np.maximum(v_max + self.velocity, 0))
+        accel_cmd = np.clip(np.clip(accel_cmd, accel_lower, accel_upper), -a_max, a_max)
+        
+        # 저크 제한 후 적분
+        acceleration = self.acceleration + np.clip(accel_cmd - self.acceleration,
+                                                   -max_jerk_step, max_jerk_step)
+        velocity = np.clip(self.velocity + acceleration * dt, -v_max, v_max)
+        position = self.position + 0.5 * (self.velocity + velocity) * dt
+        self.acceleration = (velocity - self.velocity) / dt
+        self.velocity = velocity
+        
+        # 남은 이산화 오차로 인한 관절 한계 초과 방지 (위치만 보정, 속도/가속도는 유지)
+        self.position = np.clip(position, self.model.lower_limits, self.model.upper_limits)
+        
+        return self.position
+
+class TickContext:
+    """한 틱 동안 모든 예측 방법이 공유하는 센서 샘플 및 기저 계산 결과"""
+    
+    __slots__ = ('time', 'dt', 'human', 'time_window', 'human_window', '_basis_cache')
+    
+    def __init__(self, time, dt, human, time_window, human_window):
+        self.time = time
+        self.dt = dt
+        self.human = human
+        self.time_window = time_window
+        self.human_window = human_window
+        self._basis_cache = {}
+        
+    def spline_basis(self, spline):
+        """현재 시간 창의 삼각함수 기저 (조화파 개수별로 한 번만 계산)"""
+        cached = self._basis_cache.get(spline.n_harmonics)
+        if cached is None:
+            omega = spline.window_omega(self.time_window)
+            cached = (spline.basis(self.time_window, omega), omega)
+            self._basis_cache[spline.n_harmonics] = cached
+        return cached
+
+# 예측 방법 레지스트리: 이름 -> PredictionMethod 하위 클래스
+PREDICTION_METHODS = {}
+
+def register_method(cls):
+    """예측 방법 클래스를 레지스트리에 등록 (데코레이터)"""
+    PREDICTION_METHODS[cls.name] = cls
+    return cls
+
+class PredictionMethod:
+    """예측/제어 파이프라인 기본 클래스
+    
+    각 방법은 공유 TickContext로부터 다음 시점의 인간 관절 각도만 예측하며,
+    인간-로봇 변환과 속도 제한/궤적 성형은 시뮬레이션이 모든 방법에 대해 한 번에 수행한다.
+    name/label은 클래스 기본값 대신 인스턴스별로 지정할 수 있다 (같은 방법의 여러 구성 비교).
+    """
+    
+    name = None
+    label = None
+    color = 'gray'
+    linestyle = '-'
+    
+    def __init__(self, model, name=None, label=None):
+        self.model = model
+        if name is not None:
+            self.name = name
+        if label is not None:
+            self.label = label
+        # 시뮬레이션 시간 창 크기와 저장 자료형 (configure로 설정)
+        self.window_size = None
+        self.dtype = np.dtype(np.float64)
+    
+    def configure(self, window_size, dtype):
+        """시뮬레이션 시간 창 크기/저장 자료형 설정 후 상태 초기화 (시뮬레이션 생성 시 호출)"""
+        self.window_size = window_size
+        self.dtype = storage_dtype(dtype)
+        self.reset()
+    
+    def reset(self):
+        """내부 상태 초기화"""
+        
+    def predict(self, ctx):
+        """다음 시점 관절 각도 (J,) 예측, 준비되지 않았으면 None"""
+        raise NotImplementedError
+    
+    def derivatives(self, ctx):
+        """궤적 성형 피드포워드용 (각속도, 각가속도) 예측"""
+        return 0.0, 0.0
+    
+    def staleness(self, time):
+        """사용 중인 모델 상태가 반영한 마지막 샘플 이후 경과 시간 (s)"""
+        return 0.0
+    
+    def close(self):
+        """작업 스레드 등 외부 자원 정리"""
+    
+    def state_arrays(self):
+        """스냅샷용 내부 상태 배열 목록 (구성마다 개수/모양 고정)"""
+        return []
+    
+    def load_state(self, arrays):
+        """state_arrays 순서의 배열 반복자에서 상태 복원"""
+
+@register_method
+class DirectMethod(PredictionMethod):
+    """직접 매핑 (예측 없이 현재 센서 값 사용)"""
+    
+    name = 'direct'
+    label = 'Direct'
+    color = 'red'
+    linestyle = '--'
+    
+    def predict(self, ctx):
+        return ctx.human
+
+@register_method
+class SplineMethod(PredictionMethod):
+    """삼각함수 스플라인 피팅 후 다음 시점 예측
+    
+    듀얼 레이트 모드: 예측은 매 틱 현재 계수로 수행하고, 재피팅은 refit_interval
+    틱마다 (asynchronous=True면 작업 스레드에서) 수행한다. fit_window를 지정하면
+    시뮬레이션 시간 창보다 긴 자체 이력으로 피팅한다. backend='sliding_dft'는 균일
+    샘플링 창에서 틱당 O(n_harmonics) 빈 갱신으로 같은 계수를 계산한다 (동기 실행).
+    """
+    
+    name = 'spline'
+    label = 'Spline'
+    color = 'green'
+    linestyle = '-'
+    min_samples = 10
+    
+    def __init__(self, model, n_harmonics=3, refit_interval=1, fit_window=None, asynchronous=False,
+                 backend='lstsq', name=None, label=None):
+        super().__init__(model, name, label)
+        if backend not in ('lstsq', 'sliding_dft'):
+            raise ValueError(f"Unknown spline backend: {backend}")
+        self.backend = backend
+        self.n_harmonics = n_harmonics
+        self.refit_interval = max(int(refit_interval), 1)
+        self.fit_window = fit_window
+        self.asynchronous = asynchronous
+        self._executor = None
+        self._generation = 0
+        self.reset()
+    
+    @property
+    def spline(self):
+        """현재 예측에 사용 중인 스플라인"""
+        return self._active[0]
+    
+    def reset(self):
+        # 사용 중인 피팅 (스플라인, 피팅 데이터 마지막 시각): 참조 한 번 대입으로 원자적 교체
+        self._active = (TrigonometricSpline(n_harmonics=self.n_harmonics, dtype=self.dtype), None)
+        self._generation += 1  # 진행 중인 비동기 피팅 결과 무시
+        self._pending = None
+        self._tick = 0
+        self._last_fit_tick = None
+        self.fit_count = 0
+        self.skipped_fits = 0
+        self.fit_time = 0.0
+        if self.fit_window is not None:
+            self.time_history = RingBuffer(self.fit_window)
+            self.human_history = RingBuffer(self.fit_window, (self.model.n_joints,))
+        # 빈은 피팅 창 (자체 이력 또는 시뮬레이션 시간 창)이 가득 찬 뒤에만 슬라이딩 갱신
+        capacity = self.fit_window if self.fit_window is not None else self.window_size
+        self.fitter = (SlidingDFTFitter(self.n_harmonics, (self.model.n_joints,), capacity)
+                       if self.backend == 'sliding_dft' else None)
+        
+    def predict(self, ctx):
+        if self.fit_window is not None:
+            self.time_history.append(ctx.time)
+            self.human_history.append(ctx.human)
+            t_data, angle_data = self.time_history.view(), self.human_history.view()
+        else:
+            t_data, angle_data = ctx.time_window, ctx.human_window
+        if self.fitter is not None:
+            # 재피팅하지 않는 틱에도 빈은 매 틱 갱신
+            self.fitter.update(t_data, angle_data)
+        if len(t_data) < self.min_samples:
+            return None
+        
+        self._tick += 1
+        if self._last_fit_tick is None or self._tick - self._last_fit_tick >= self.refit_interval:
+            self._refit(ctx, t_data, angle_data)
+        
+        spline, fit_end = self._active
+        if fit_end is None:
+            return None  # 첫 비동기 피팅 대기 중
+        return spline.predict_batch(ctx.time + ctx.dt)
+    
+    def _refit(self, ctx, t_data, angle_data):
+        """재피팅 실행 (비동기 모드에서는 이전 피팅이 끝나지 않았으면 건너뜀)"""
+        if self.fitter is not None:
+            # 슬라이딩 DFT 빈은 매 틱 메인 스레드에서 갱신되므로 작업 스레드 없이 피팅
+            self._fit(t_data, angle_data, self._generation)
+        elif not self.asynchronous:
+            # 스플라인 피팅 (모든 관절 동시, 시뮬레이션 시간 창이면 공유 기저 사용)
+            basis = ctx.spline_basis(self.spline) if self.fit_window is None else None
+            self._fit(t_data, angle_data, self._generation, basis)
+        elif self._pending is not None and not self._pending.done():
+            self.skipped_fits += 1
+            return
+        else:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='spline-refit')
+            # 작업 스레드가 읽는 동안 버퍼가 바뀌지 않도록 복사본 전달
+            self._pending = self._executor.submit(self._fit, np.array(t_data), np.array(angle_data),
+                                                  self._generation)
+        self._last_fit_tick = self._tick
+    
+    def _fit(self, t_data, angle_data, generation, basis=None):
+        """새 스플라인을 피팅한 뒤 사용 중인 계수와 교체"""
+        start = time.perf_counter()
+        spline = TrigonometricSpline(n_harmonics=self.n_harmonics, dtype=self.dtype)
+        if self.fitter is not None:
+            self.fitter.fit(spline, t_data, angle_data)
+        else:
+            spline.fit_batch(t_data, angle_data, basis=basis)
+        self.fit_time += time.perf_counter() - start
+        self.fit_count += 1
+        if generation == self._generation:
+            self._active = (spline, float(t_data[-1]))
+    
+    def derivatives(self, ctx):
+        future_time = ctx.time + ctx.dt
+        return (self.spline.predict_batch(future_time, order=1),
+                self.spline.predict_batch(future_time, order=2))
+    
+    def staleness(self, time):
+        fit_end = self._active[1]
+        return 0.0 if fit_end is None else time - fit_end
+    
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+    
+    def __getstate__(self):
+        # 복제/피클 시 작업 스레드 자원 제외
+        state = self.__dict__.copy()
+        state['_executor'] = None
+        state['_pending'] = None
+        return state
+    
+    def state_arrays(self):
+        # 계수는 피팅 전에도 고정 모양 (1 + 2 * n_harmonics, J)으로 저장
+        spline, fit_end = self._active
+        coeffs = np.zeros((1 + 2 * self.n_harmonics, self.model.n_joints))
+        if spline.coeff_matrix is not None:
+            coeffs[:] = spline.coeff_matrix
+        counters = np.array([
+            spline.omega,
+            np.nan if fit_end is None else fit_end,
+            spline.coeff_matrix is not None,
+            self._tick,
+            -1 if self._last_fit_tick is None else self._last_fit_tick,
+            self.fit_count,
+            self.skipped_fits
+        ], dtype=float)
+        arrays = [coeffs, counters]
+        if self.fit_window is not None:
+            arrays += self.time_history.state_arrays() + self.human_history.state_arrays()
+        if self.fitter is not None:
+            arrays += self.fitter.state_arrays()
+        return arrays
+    
+    def load_state(self, arrays):
+        coeffs = next(arrays)
+        omega, fit_end, fitted, tick, last_fit_tick, fit_count, skipped_fits = next(arrays)
+        spline = TrigonometricSpline(n_harmonics=self.n_harmonics, dtype=self.dtype)
+        spline.omega = float(omega)
+        spline.coeff_matrix = np.array(coeffs, dtype=self.dtype) if fitted else None
+        self._generation += 1  # 복원 전 시작된 비동기 피팅 결과 무시
+        self._pending = None
+        self._active = (spline, None if np.isnan(fit_end) else float(fit_end))
+        self._tick = int(tick)
+        self._last_fit_tick = None if last_fit_tick < 0 else int(last_fit_tick)
+        self.fit_count = int(fit_count)
+        self.skipped_fits = int(skipped_fits)
+        if self.fit_window is not None:
+            self.time_history.load_state(arrays)
+            self.human_history.load_state(arrays)
+        if self.fitter is not None:
+            self.fitter.load_state(arrays)
+
+@register_method
+class FilterMethod(PredictionMethod):
+    """알파-베타-감마 필터 상태 추정 후 다음 시점 예측"""
+    
+    name = 'filter'
+    label = 'Filter'
+    color = 'magenta'
+    linestyle = '-.'
+    
+    def __init__(self, model, process_noise=100.0, measurement_noise=2.0, name=None, label=None):
+        super().__init__(model, name, label)
+        self.process_noise = process_noise
+        self.measurement_noise = measurement_noise
+        self.abg_filter = None
+    
+    def reset(self):
+        self.abg_filter = None
+        
+    def predict(self, ctx):
+        # 주기가 바뀌면 정상상태 이득을 다시 계산
+        if self.abg_filter is None or self.abg_filter.dt != ctx.dt:
+            self.abg_filter = AlphaBetaGammaFilter(self.model.n_joints, ctx.dt,
+                                                   self.process_noise, self.measurement_noise)
+        self.abg_filter.update(ctx.human)
+        return self.abg_filter.predict(ctx.dt)
+    
+    def derivatives(self, ctx):
+        return self.abg_filter.predict(ctx.dt, order=1), self.abg_filter.predict(ctx.dt, order=2)
+    
+    def state_arrays(self):
+        # 필터 생성 전에도 고정 모양 유지: [생성 여부, dt] + 상태 배열
+        n_joints = self.model.n_joints
+        if self.abg_filter is None:
+            return [np.array([0.0, 0.0]), np.zeros(n_joints), np.zeros(n_joints), np.zeros(n_joints),
+                    np.array([False])]
+        return [np.array([1.0, self.abg_filter.dt])] + self.abg_filter.state_arrays()
+    
+    def load_state(self, arrays):
+        created, dt = next(arrays)
+        if not created:
+            self.abg_filter = None
+            for _ in range(4):
+                next(arrays)
+            return
+        if self.abg_filter is None or self.abg_filter.dt != dt:
+            self.abg_filter = AlphaBetaGammaFilter(self.model.n_joints, float(dt),
+                                                   self.process_noise, self.measurement_noise)
+        self.abg_filter.load_state(arrays)
 
 class RealTimeSimulation:
     """실시간 시뮬레이션 시스템"""
     
-    def __init__(self, window_size=50):
-        self.sensor = HumanMotionSensor()
-        self.spline = TrigonometricSpline(n_harmonics=3)
-        self.controller = RobotTrajectoryController()
+    def __init__(self, window_size=50, model=None, trajectory_shaping=False, shaping_feedforward=False,
+                 methods=('spline', 'direct', 'filter'), dtype=np.float64, method_options=None, seed=None,
+                 workspace=None, mapping='joint'):
+        self.model = model if model is not None else RobotModel.default()
+        self.joint_keys = self.model.joint_names
+        
+        # 작업 공간 인덱스 (True면 캐시에서 불러오거나 계산): 예측 끝점 목표의 도달 가능 여부 검사
+        if workspace is True:
+            workspace = RobotWorkspace.load_or_compute(self.model)
+        self.workspace = workspace or None
+        
+        # 복제 (fork)용 생성 인자
+        self._config = dict(window_size=window_size, model=self.model, trajectory_shaping=trajectory_shaping,
+                            shaping_feedforward=shaping_feedforward, methods=methods, dtype=dtype,
+                            method_options=method_options, workspace=self.workspace, mapping=mapping)
+        
+        # seed를 지정하면 센서 노이즈까지 포함해 실행이 정확히 재현됨
+        self.sensor = HumanMotionSensor(self.model, seed=seed)
+        self.controller = RobotTrajectoryController(self.model)
+        # 인간-로봇 매핑 방식: 'joint' (관절별 스케일링) 또는 'cartesian' (손 위치를 끝점 역기구학으로 추종)
+        if mapping not in ('joint', 'cartesian'):
+            raise ValueError(f"Unknown mapping: {mapping}")
+        self.mapping = mapping
+        
+        # 예측 방법 (레지스트리 이름 또는 PredictionMethod 인스턴스)
+        # method_options: 이름별 생성 인자, 예) {'spline': {'refit_interval': 5, 'asynchronous': True}}
+        # 같은 방법의 여러 구성은 인스턴스에 서로 다른 name 지정, 예) SplineMethod(model, name='spline_r5')
+        method_options = method_options or {}
+        self.methods = [PREDICTION_METHODS[m](self.model, **method_options.get(m, {})) if isinstance(m, str) else m
+                        for m in methods]
+        self.method_names = [method.name for method in self.methods]
+        duplicates = sorted({name for name in self.method_names if self.method_names.count(name) > 1})
+        if duplicates:
+            raise ValueError(f"Duplicate prediction method names: {duplicates} (pass name= to distinguish them)")
+        self.method_index = {name: i for i, name in enumerate(self.method_names)}
         
         self.window_size = window_size
-        self.time_window = deque(maxlen=window_size)
-        self.human_data = {
-            'shoulder': deque(maxlen=window_size),
-            'elbow': deque(maxlen=window_size),
-            'wrist': deque(maxlen=window_size)
-        }
-        # 스플라인 적용된 로봇 데이터
-        self.robot_data_spline = {
-            'shoulder': deque(maxlen=window_size),
-            'elbow': deque(maxlen=window_size),
-            'wrist': deque(maxlen=window_size)
-        }
-        # 스플라인 없는 로봇 데이터 (직접 매핑)
-        self.robot_data_direct = {
-            'shoulder': deque(maxlen=window_size),
-            'elbow': deque(maxlen=window_size),
-            'wrist': deque(maxlen=window_size)
-        }
+        # 각도 이력 저장 자료형 (시간은 위상 정밀도를 위해 항상 float64)
+        self.dtype = storage_dtype(dtype)
+        n_methods, n_joints = len(self.methods), self.model.n_joints
+        self.time_window = RingBuffer(window_size)
+        self.human_data = RingBuffer(window_size, (n_joints,), self.dtype)
+        # 모든 방법의 로봇 데이터를 하나의 버퍼에 저장: (방법, 관절)
+        self.robot_data = RingBuffer(window_size, (n_methods, n_joints), self.dtype)
+        # 방법별 예측 준비 여부 (워밍업 중 샘플은 지표에서 제외)
+        self.ready_data = RingBuffer(window_size, (n_methods,), bool)
+        # 방법별 계수/이력도 시뮬레이션 저장 자료형과 시간 창 크기를 따름
+        for method in self.methods:
+            method.configure(window_size, self.dtype)
         
         self.current_time = 0
         self.dt = 0.05  # 50ms 업데이트 주기
         self.is_running = False
         
-        self.current_robot_angles_spline = {'shoulder': 0, 'elbow': 0, 'wrist': 0}
-        self.current_robot_angles_direct = {'shoulder': 0, 'elbow': 0, 'wrist': 0}
+        self.current_robot_angles = np.zeros((n_methods, n_joints))
+        
+        # 저크 제한 궤적 성형 (사용 시 단순 속도 제한 대체)
+        self.trajectory_shaping = trajectory_shaping
+        # 예측 도함수 피드포워드 사용 여부: 지연은 줄지만 (필터 약 17 ms -> 0 ms) 예측 도함수
+        # 오차 때문에 기본 구성에서 RMSE가 커지므로 (스플라인 18.7° -> 34.5°) 기본값은 미사용
+        self.shaping_feedforward = shaping_feedforward
+        self.shaper = self.controller.create_shaper((n_methods, n_joints))
+        
+        # 단계/방법별 누적 계산 시간 (정확도 대비 비용 비교용)
+        self.shared_time = {'sense': 0.0, 'control': 0.0}
+        self.method_time = np.zeros(n_methods)
+        self.tick_count = 0
+        # 방법별 모델 상태 경과 시간 (현재, 누적, 최대) [s]
+        self.staleness = np.zeros(n_methods)
+        self.staleness_total = np.zeros(n_methods)
+        self.staleness_max = np.zeros(n_methods)
+        # 방법별 예측 목표 (관절 한계 적용 전) 끝점의 도달 가능 여부 및 도달 불가 틱 수
+        self.target_reachable = np.ones(n_methods, dtype=bool)
+        self.unreachable_count = np.zeros(n_methods, dtype=np.int64)
+        
+        # 틱마다 호출되는 콜백 (녹화, 외부 게시 등)
+        self.tick_listeners = []
+        
+    def method(self, name):
+        """이름으로 예측 방법 객체 조회"""
+        return self.methods[self.method_index[name]]
+    
+    def add_tick_listener(self, listener):
+        """틱 종료 후 listener(simulation) 호출 등록"""
+        self.tick_listeners.append(listener)
+    
+    def close(self):
+        """예측 방법의 작업 스레드 정리"""
+        for method in self.methods:
+            method.close()
+    
+    def state_arrays(self):
+        """전체 시뮬레이션 상태 배열 목록 (시간, 버퍼, 제어/센서/방법 상태)"""
+        arrays = [np.array([self.current_time, self.dt, self.tick_count])]
+        for buffer in (self.time_window, self.human_data, self.robot_data, self.ready_data):
+            arrays += buffer.state_arrays()
+        arrays += [self.current_robot_angles, self.staleness, self.staleness_total, self.staleness_max,
+                   self.method_time, np.array([self.shared_time['sense'], self.shared_time['control']]),
+                   self.target_reachable, self.unreachable_count]
+        arrays += self.shaper.state_arrays() + self.sensor.state_arrays()
+        for method in self.methods:
+            arrays += method.state_arrays()
+        return arrays
+    
+    def load_state(self, arrays):
+        """state_arrays 순서의 배열 반복자에서 상태 복원"""
+        current_time, dt, tick_count = next(arrays)
+        self.current_time, self.dt, self.tick_count = float(current_time), float(dt), int(tick_count)
+        for buffer in (self.time_window, self.human_data, self.robot_data, self.ready_data):
+            buffer.load_state(arrays)
+        self.current_robot_angles = np.array(next(arrays))
+        for target in (self.staleness, self.staleness_total, self.staleness_max, self.method_time):
+            np.copyto(target, next(arrays))
+        self.shared_time['sense'], self.shared_time['control'] = (float(value) for value in next(arrays))
+        np.copyto(self.target_reachable, next(arrays))
+        np.copyto(self.unreachable_count, next(arrays))
+        self.shaper.load_state(arrays)
+        self.sensor.load_state(arrays)
+        for method in self.methods:
+            method.load_state(arrays)
+    
+    def snapshot(self):
+        """전체 상태를 하나의 연속 바이트 배열 (uint8)로 저장
+        
+        배열 모양/자료형은 구성에서 정해지므로 값만 순서대로 이어 붙인다.
+        tobytes()로 파일에 쓰고 np.frombuffer(data, np.uint8)로 다시 읽을 수 있다.
+        """
+        return np.concatenate([np.ascontiguousarray(array).reshape(-1).view(np.uint8)
+                               for array in self.state_arrays()])
+    
+    def restore(self, snapshot):
+        """snapshot()으로 저장한 상태 복원 (같은 구성의 시뮬레이션에서만 가능)"""
+        snapshot = np.asarray(snapshot, dtype=np.uint8)
+        template = self.state_arrays()
+        if snapshot.nbytes != sum(array.nbytes for array in template):
+            raise ValueError("Snapshot does not match this simulation configuration")
+        
+        arrays, offset = [], 0
+        for array in template:
+            arrays.append(snapshot[offset:offset + array.nbytes].view(array.dtype).reshape(array.shape))
+            offset += array.nbytes
+        self.load_state(iter(arrays))
+    
+    def fork(self, snapshot=None, seed=None):
+        """같은 구성의 새 시뮬레이션을 만들어 상태 복원 (seed 지정 시 이후 노이즈만 달라짐)"""
+        config = dict(self._config)
+        # 인스턴스로 전달된 방법은 복제본 사용
+        config['methods'] = [copy.deepcopy(m) if isinstance(m, PredictionMethod) else m for m in config['methods']]
+        clone = RealTimeSimulation(**config)
+        clone.restore(self.snapshot() if snapshot is None else snapshot)
+        if seed is not None:
+            clone.sensor.rng = np.random.default_rng(seed)
+        return clone
         
     def update_data(self):
         """데이터 업데이트 (센서 읽기 시뮬레이션)"""
+        t_start = time.perf_counter()
+        
         # 인간 동작 데이터 수집
-        human_angles = self.sensor.get_current_angles(self.current_time)
+        human_angles = self.sensor.sample(self.current_time)
         
         # 시간 창에 데이터 추가
         self.time_window.append(self.current_time)
-        for joint, angle in human_angles.items():
-            self.human_data[joint].append(angle)
-        
-        # 방법 1: 직접 매핑 (스플라인 없음)
-        target_robot_angles_direct = self.controller.human_to_robot_mapping(human_angles)
-        self.current_robot_angles_direct = self.controller.velocity_limiting(
-            self.current_robot_angles_direct, target_robot_angles_direct, self.dt
-        )
-        
-        for joint, angle in self.current_robot_angles_direct.items():
-            self.robot_data_direct[joint].append(angle)
-        
-        # 방법 2: 스플라인 적용
-        if len(self.time_window) >= 10:
-            # 스플라인 피팅
-            t_array = np.array(self.time_window)
-            for joint in human_angles:
-                angle_array = np.array(self.human_data[joint])
-                self.spline.fit(t_array, angle_array, joint)
-            
-            # 미래 시점 예측
-            future_time = self.current_time + self.dt
-            predicted_angles = {}
-            
-            for joint in human_angles:
-                predicted_angles[joint] = self.spline.predict(future_time, joint)
-            
-            # 인간-로봇 변환
-            target_robot_angles_spline = self.controller.human_to_robot_mapping(predicted_angles)
-            
+        self.human_data.append(human_angles)
+        
+        ctx = TickContext(self.current_time, self.dt, human_angles,
+                          self.time_window.view(), self.human_data.view())
+        t_sense = time.perf_counter()
+        
+        # 각 방법의 예측 (준비되지 않은 방법은 현재 로봇 각도 유지)
+        predicted = np.zeros(self.current_robot_angles.shape)
+        ready = np.zeros(len(self.methods), dtype=bool)
+        for m, method in enumerate(self.methods):
+            t_method = time.perf_counter()
+            prediction = method.predict(ctx)
+            if prediction is not None:
+                predicted[m] = prediction
+                ready[m] = True
+            self.method_time[m] += time.perf_counter() - t_method
+            self.staleness[m] = method.staleness(self.current_time)
+        t_predict = time.perf_counter()
+        self.staleness_total += self.staleness
+        np.maximum(self.staleness_max, self.staleness, out=self.staleness_max)
+        
+        # 인간-로봇 변환 (모든 방법 동시)
+        # 끝점 매핑은 현재 로봇 자세에서 역기구학을 시작 (연속된 해 선택)
+        mapped = self.controller.map_targets(predicted, self.mapping, initial=self.current_robot_angles)
+        target = np.where(ready[:, None], mapped, self.current_robot_angles)
+        
+        if self.workspace is not None:
+            # 관절 한계로 자르기 전 목표 자세 (끝점 매핑은 손 위치)의 끝점이 작업 공간 안인지 격자 조회
+            if self.mapping == 'cartesian':
+                end_points = self.controller.hand_pose(predicted)[0]
+            else:
+                end_points = self.model.forward_kinematics(predicted * self.model.scaling_factors)[:, -1]
+            self.target_reachable = self.workspace.is_reachable(end_points) | ~ready
+            self.unreachable_count += ~self.target_reachable
+        
+        if self.trajectory_shaping:
+            # 예측 도함수를 피드포워드로 사용 (관절 한계에 걸린 관절은 제외)
+            target_velocity = np.zeros(target.shape)
+            target_acceleration = np.zeros(target.shape)
+            # 예측 도함수는 인간 관절 공간 값이므로 관절 스케일링 매핑에서만 사용
+            if self.shaping_feedforward and self.mapping == 'joint':
+                scale = self.model.scaling_factors * (mapped == predicted * self.model.scaling_factors)
+                for m in np.flatnonzero(ready):
+                    velocity, acceleration = self.methods[m].derivatives(ctx)
+                    target_velocity[m] = scale[m] * velocity
+                    target_acceleration[m] = scale[m] * acceleration
+            self.current_robot_angles = self.shaper.update(target, self.dt, target_velocity,
+                                                           target_acceleration)
+        else:
             # 속도 제한 적용
-            self.current_robot_angles_spline = self.controller.velocity_limiting(
-                self.current_robot_angles_spline, target_robot_angles_spline, self.dt
+            self.current_robot_angles = self.controller.limit_velocity(
+                self.current_robot_angles, target, self.dt
             )
-            
-            # 스플라인 로봇 데이터 저장
-            for joint, angle in self.current_robot_angles_spline.items():
-                self.robot_data_spline[joint].append(angle)
-        else:
-            # 초기 데이터 부족 시 기본값
-            for joint in human_angles:
-                self.robot_data_spline[joint].append(0)
+        
+        self.robot_data.append(self.current_robot_angles)
+        self.ready_data.append(ready)
+        t_end = time.perf_counter()
+        
+        self.shared_time['sense'] += t_sense - t_start
+        self.shared_time['control'] += t_end - t_predict
+        self.tick_count += 1
         
         self.current_time += self.dt
+        
+        for listener in self.tick_listeners:
+            listener(self)
+    
+    def get_method_data(self, method):
+        """방법별 로봇 데이터 (시간, 관절) 뷰"""
+        return self.robot_data.view()[:, self.method_index[method]]
     
     def get_performance_metrics(self):
         """성능 지표 계산"""
         if len(self.time_window) < 10:
             return {}
         
-        metrics = {'spline': {}, 'direct': {}}
+        # 모든 방법/관절 동시 계산: (방법, 관절)
+        # 틱에서 계산한 로봇 각도는 한 주기 동안 이동한 뒤의 자세이므로 t + dt 시각으로 정렬
+        times = self.time_window.view()
+        result = evaluate_tracking(times, self.human_data.view(), self.robot_data.view(),
+                                   output_times=times + self.dt, valid=self.ready_data.view())
         
-        for joint in ['shoulder', 'elbow', 'wrist']:
-            if (len(self.human_data[joint]) >= 10 and 
-                len(self.robot_data_spline[joint]) >= 10 and
-                len(self.robot_data_direct[joint]) >= 10):
-                
-                human_array = np.array(list(self.human_data[joint]))
-                robot_spline_array = np.array(list(self.robot_data_spline[joint]))
-                robot_direct_array = np.array(list(self.robot_data_direct[joint]))
-                
-                # 지연을 고려한 정렬 (최근 데이터 비교)
-                min_len = min(len(human_array), len(robot_spline_array), len(robot_direct_array))
-                if min_len > 5:
-                    h_data = human_array[-min_len:]
-                    r_spline_data = robot_spline_array[-min_len:]
-                    r_direct_data = robot_direct_array[-min_len:]
-                    
-                    # 스플라인 적용 버전 성능
-                    rmse_spline = np.sqrt(np.mean((h_data - r_spline_data)**2))
-                    correlation_spline = np.correlate(h_data, r_spline_data, mode='full')
-                    lag_spline = np.argmax(correlation_spline) - (len(r_spline_data) - 1)
-                    delay_ms_spline = abs(lag_spline) * self.dt * 1000
-                    
-                    # 직접 매핑 버전 성능
-                    rmse_direct = np.sqrt(np.mean((h_data - r_direct_data)**2))
-                    correlation_direct = np.correlate(h_data, r_direct_data, mode='full')
-                    lag_direct = np.argmax(correlation_direct) - (len(r_direct_data) - 1)
-                    delay_ms_direct = abs(lag_direct) * self.dt * 1000
-                    
-                    # 부드러움 측정 (저크 계산)
-                    if min_len > 2:
-                        # 2차 차분으로 저크 근사
-                        jerk_spline = np.mean(np.abs(np.diff(r_spline_data, n=2)))
-                        jerk_direct = np.mean(np.abs(np.diff(r_direct_data, n=2)))
-                    else:
-                        jerk_spline = jerk_direct = 0
-                    
-                    metrics['spline'][joint] = {
-                        'rmse': rmse_spline,
-                        'delay_ms': delay_ms_spline,
-                        'jerk': jerk_spline
-                    }
-                    
-                    metrics['direct'][joint] = {
-                        'rmse': rmse_direct,
-                        'delay_ms': delay_ms_direct,
-                        'jerk': jerk_direct
-                    }
+        metrics = {}
+        for m, method in enumerate(self.method_names):
+            metrics[method] = {}
+            for i, joint in enumerate(self.joint_keys):
+                metrics[method][joint] = {
+                    'rmse': result['rmse'][m, i],
+                    'rmse_aligned': result['rmse_aligned'][m, i],  # 지연 보정 후
+                    'lag_ms': result['lag'][m, i] * 1000,         # 양수 = 로봇이 늦음
+                    'delay_ms': abs(result['lag'][m, i]) * 1000,
+                    'jerk': result['jerk'][m, i]
+                }
         
         return metrics
     
+    def get_timing_stats(self):
+        """공유 단계 및 방법별 틱 당 평균 계산 시간 (us)"""
+        if self.tick_count == 0:
+            return {}
+        scale = 1e6 / self.tick_count
+        return {
+            'shared': {stage: total * scale for stage, total in self.shared_time.items()},
+            'methods': dict(zip(self.method_names, self.method_time * scale))
+        }
+    
+    def get_staleness_stats(self):
+        """방법별 사용 중인 모델 상태의 경과 시간 (ms)"""
+        if self.tick_count == 0:
+            return {}
+        return {name: {'current_ms': self.staleness[m] * 1000,
+                       'mean_ms': self.staleness_total[m] / self.tick_count * 1000,
+                       'max_ms': self.staleness_max[m] * 1000}
+                for m, name in enumerate(self.method_names)}
+    
+    def get_reachability_stats(self):
+        """방법별 예측 끝점 목표의 도달 불가 비율 (작업 공간 검사 사용 시)"""
+        if self.workspace is None or self.tick_count == 0:
+            return {}
+        return {name: {'reachable': bool(self.target_reachable[m]),
+                       'unreachable_ratio': self.unreachable_count[m] / self.tick_count}
+                for m, name in enumerate(self.method_names)}
+    
+    def memory_footprint(self):
+        """이력 버퍼 및 제어 상태 배열의 메모리 사용량 (bytes)"""
+        buffers = (self.time_window, self.human_data, self.robot_data, self.ready_data)
+        state = (self.current_robot_angles, self.shaper.position, self.shaper.velocity, self.shaper.acceleration)
+        return sum(buffer.nbytes for buffer in buffers) + sum(array.nbytes for array in state)
+    
     def get_robot_arm_position(self, method='spline'):
         """로봇 팔의 현재 위치 계산"""
-        if method == 'spline':
-            data = self.robot_data_spline
-        else:
-            data = self.robot_data_direct
-            
-        if len(data['shoulder']) == 0:
+        if len(self.robot_data) == 0:
             return None
-            
-        shoulder_angle = np.radians(data['shoulder'][-1])
-        elbow_angle = np.radians(data['elbow'][-1])
-        wrist_angle = np.radians(data['wrist'][-1])
-        
-        # 로봇 팔 세그먼트 계산
-        L1, L2, L3 = 1.0, 0.8, 0.3  # 링크 길이
         
-        # 어깨
-        x1 = L1 * np.cos(shoulder_angle)
-        y1 = L1 * np.sin(shoulder_angle)
+        # 순기구학: 각 관절 위치 + 끝점
+        points = self.model.forward_kinematics(self.robot_data.last()[self.method_index[method]])
         
-        # 팔꿈치
-        x2 = x1 + L2 * np.cos(shoulder_angle + elbow_angle)
-        y2 = y1 + L2 * np.sin(shoulder_angle + elbow_angle)
-        
-        # 손목
-        x3 = x2 + L3 * np.cos(shoulder_angle + elbow_angle + wrist_angle)
-        y3 = y2 + L3 * np.sin(shoulder_angle + elbow_angle + wrist_angle)
-        
-        return {
-            'shoulder': (0, 0),
-            'elbow': (x1, y1),
-            'wrist': (x2, y2),
-            'end': (x3, y3)
-        }
\ No newline at end of file
+        positions = {joint: tuple(points[i]) for i, joint in enumerate(self.joint_keys)}
+        positions['end'] = tuple(points[-1])
+        return positions
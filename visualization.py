@@ -3,17 +3,37 @@ Human-Robot Trajectory Control Visualization Module
 시각화 및 사용자 인터페이스를 담당하는 모듈
 """
 
+import os
+import shutil
+import subprocess
+import tempfile
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 import numpy as np
 import matplotlib.pyplot as plt
 import matplotlib.animation as animation
+from matplotlib.patches import Rectangle
+from matplotlib.transforms import Bbox
 from matplotlib.widgets import Slider, Button
 from collections import deque  # deque import 추가
 
+from lod import MinMaxDecimator
+from workspace import RobotWorkspace
+
 class SimulationVisualizer:
     """시뮬레이션 시각화 클래스"""
     
-    def __init__(self, simulation):
+    def __init__(self, simulation, interactive=True, long_history=False, history_seconds=300.0):
         self.simulation = simulation
+        self.interactive = interactive  # False: 오프스크린 렌더링 (슬라이더/버튼 생략)
+        # 장기 이력 모드: 관절 차트에 최근 history_seconds 초를 최소/최대 축약으로 표시
+        self.long_history = long_history
+        self.history_seconds = history_seconds
+        # 오프스크린 렌더링 시 축 범위를 단계적으로만 바꿔 배경 캐시를 재사용
+        self.stable_limits = not interactive
+        self._background = None
+        self._background_state = None
+        self._static_boxes = {}  # 축별 정적 요소 (눈금, 라벨 포함) 픽셀 영역
         self.fig = None
         self.axes = {}
         self.lines = {}
@@ -22,8 +42,24 @@ class SimulationVisualizer:
         self.performance_text = None
         self.trajectory_data = {}  # 궤적 데이터용
         
-        self.joint_names = ['Shoulder', 'Elbow', 'Wrist']
-        self.joint_keys = ['shoulder', 'elbow', 'wrist']
+        self.joint_keys = list(simulation.model.joint_names)
+        self.joint_names = [key.capitalize() for key in self.joint_keys]
+        # 링크 이름 (기본 3관절 팔은 기존 명칭 유지)
+        n_links = len(self.joint_keys)
+        self.link_names = (['Upper Arm', 'Forearm', 'Hand'] if n_links == 3
+                           else [f'Link {i + 1}' for i in range(n_links)])
+        
+        # 비교할 예측 방법 (개별 로봇 팔 차트는 앞의 두 방법만 표시)
+        self.methods = simulation.methods
+        self.arm_methods = [method.name for method in self.methods[:2]]
+        self.arm_palettes = [['g-', 'b-', 'r-'], ['orange', 'purple', 'brown']]
+        
+        # 전체 세션 이력 (틱마다 증분 인덱싱): 채널 = 인간 관절 + 방법별 로봇 관절
+        self.history = MinMaxDecimator(len(self.joint_keys) * (1 + len(self.methods)), dtype=simulation.dtype)
+        simulation.add_tick_listener(self.record_history)
+        
+        # 로봇 작업 공간 (축 범위 자동 설정 및 도달 영역 표시, 디스크 캐시 사용)
+        self.workspace = simulation.workspace or RobotWorkspace.load_or_compute(simulation.model)
         
         self.setup_figure()
         self.setup_plots()
@@ -44,14 +80,14 @@ class SimulationVisualizer:
             hspace=0.45     # 세로 간격 증가 (텍스트 겹침 방지)
         )
         
-        # 상단: 관절별 비교 (3개)
-        self.axes['joint1'] = plt.subplot(3, 3, 1)  # Shoulder
-        self.axes['joint2'] = plt.subplot(3, 3, 2)  # Elbow  
-        self.axes['joint3'] = plt.subplot(3, 3, 3)  # Wrist
+        # 상단: 관절별 비교 (관절 수만큼)
+        n_joints = len(self.joint_keys)
+        for i in range(n_joints):
+            self.axes[f'joint{i + 1}'] = plt.subplot(3, n_joints, i + 1)
         
-        # 중단: 로봇 팔 비교 (2개)
-        self.axes['robot_spline'] = plt.subplot(3, 3, 4)   # Robot Arm Spline
-        self.axes['robot_direct'] = plt.subplot(3, 3, 5)   # Robot Arm Direct
+        # 중단: 로봇 팔 비교 (앞의 두 방법 + 오버레이)
+        for i, name in enumerate(self.arm_methods):
+            self.axes[f'robot_{name}'] = plt.subplot(3, 3, 4 + i)
         self.axes['robot_overlay'] = plt.subplot(3, 3, 6)  # Overlay Comparison
         
         # 하단: 성능 비교 (3개)
@@ -59,13 +95,14 @@ class SimulationVisualizer:
         self.axes['smoothness'] = plt.subplot(3, 3, 8)     # Jerk Comparison
         self.axes['trajectory'] = plt.subplot(3, 3, 9)     # End-effector Trajectory
         
-        self.fig.suptitle('Comprehensive Spline vs Direct Mapping Comparison - Real-time Human-Robot Control', 
+        method_labels = ' vs '.join(method.label for method in self.methods)
+        self.fig.suptitle(f'Comprehensive {method_labels} Comparison - Real-time Human-Robot Control', 
                          fontsize=13, fontweight='bold', y=0.98)
         
     def setup_plots(self):
         """각 플롯 설정"""
         # 개별 관절 비교 차트 설정
-        joint_axes = [self.axes['joint1'], self.axes['joint2'], self.axes['joint3']]
+        joint_axes = [self.axes[f'joint{i + 1}'] for i in range(len(self.joint_keys))]
         
         for i, (ax, name, key) in enumerate(zip(joint_axes, self.joint_names, self.joint_keys)):
             ax.set_title(f'{name} Joint Comparison', fontsize=14, fontweight='bold', pad=15)
@@ -80,8 +117,10 @@ class SimulationVisualizer:
             
             # 라인 초기화
             self.lines[f'human_{key}'], = ax.plot([], [], 'b-', alpha=0.8, linewidth=2.5, label='Human')
-            self.lines[f'robot_spline_{key}'], = ax.plot([], [], 'g-', alpha=0.8, linewidth=2.5, label='Robot-Spline')
-            self.lines[f'robot_direct_{key}'], = ax.plot([], [], 'r--', alpha=0.8, linewidth=2.5, label='Robot-Direct')
+            for method in self.methods:
+                self.lines[f'robot_{method.name}_{key}'], = ax.plot(
+                    [], [], color=method.color, linestyle=method.linestyle, alpha=0.8, linewidth=2.5,
+                    label=f'Robot-{method.label}')
             ax.legend(fontsize=10, loc='upper left', framealpha=0.9)  # 위치를 upper left로 변경
         
         # 성능 비교 차트
@@ -93,92 +132,77 @@ class SimulationVisualizer:
         ax_perf.tick_params(labelsize=10)
         
         x_pos = np.arange(len(self.joint_names))
-        width = 0.35
-        self.bars['performance_spline'] = ax_perf.bar(x_pos - width/2, [0, 0, 0], width, 
-                                                     label='Spline', color='green', alpha=0.7)
-        self.bars['performance_direct'] = ax_perf.bar(x_pos + width/2, [0, 0, 0], width, 
-                                                     label='Direct', color='red', alpha=0.7)
+        self._add_method_bars(ax_perf, 'performance', x_pos)
         ax_perf.set_xticks(x_pos)
         ax_perf.set_xticklabels(self.joint_names)
         ax_perf.legend(fontsize=11, loc='upper left', framealpha=0.9)  # 위치 변경
         
-        # 로봇 팔 시각화 - 스플라인 방법
-        ax_robot_spline = self.axes['robot_spline']
-        ax_robot_spline.set_title('Robot Arm - Spline Method', fontsize=14, fontweight='bold', pad=15)
-        ax_robot_spline.set_xlim(-3.2, 4.2)
-        ax_robot_spline.set_ylim(-2.2, 2.2)
-        ax_robot_spline.set_aspect('equal')
-        ax_robot_spline.grid(True, alpha=0.3)
-        ax_robot_spline.tick_params(labelsize=10)
-        
-        self.lines['robot_spline_upper'], = ax_robot_spline.plot([0, 0], [0, 0], 'g-', linewidth=6, label='Upper Arm')
-        self.lines['robot_spline_forearm'], = ax_robot_spline.plot([0, 0], [0, 0], 'b-', linewidth=6, label='Forearm')
-        self.lines['robot_spline_hand'], = ax_robot_spline.plot([0, 0], [0, 0], 'r-', linewidth=4, label='Hand')
-        # 관절 포인트 추가
-        self.lines['robot_spline_joints'], = ax_robot_spline.plot([], [], 'ko', markersize=8, label='Joints')
-        ax_robot_spline.legend(fontsize=10, loc='upper left', framealpha=0.9)  # 위치 변경
-        
-        # 로봇 팔 시각화 - 직접 매핑 방법
-        ax_robot_direct = self.axes['robot_direct']
-        ax_robot_direct.set_title('Robot Arm - Direct Method', fontsize=14, fontweight='bold', pad=15)
-        ax_robot_direct.set_xlim(-3.2, 4.2)
-        ax_robot_direct.set_ylim(-2.2, 2.2)
-        ax_robot_direct.set_aspect('equal')
-        ax_robot_direct.grid(True, alpha=0.3)
-        ax_robot_direct.tick_params(labelsize=10)
-        
-        self.lines['robot_direct_upper'], = ax_robot_direct.plot([0, 0], [0, 0], 'orange', linewidth=6, label='Upper Arm')
-        self.lines['robot_direct_forearm'], = ax_robot_direct.plot([0, 0], [0, 0], 'purple', linewidth=6, label='Forearm')
-        self.lines['robot_direct_hand'], = ax_robot_direct.plot([0, 0], [0, 0], 'brown', linewidth=4, label='Hand')
-        # 관절 포인트 추가
-        self.lines['robot_direct_joints'], = ax_robot_direct.plot([], [], 'ko', markersize=8, label='Joints')
-        ax_robot_direct.legend(fontsize=10, loc='upper left', framealpha=0.9)  # 위치 변경
+        # 로봇 팔 차트 축 범위: 팔 전체가 지날 수 있는 영역 (범례 공간 포함)
+        arm_xlim, arm_ylim = self.workspace.bounds(margin=0.3, links=True)
+        
+        # 로봇 팔 시각화 - 방법별 개별 차트
+        for name, palette in zip(self.arm_methods, self.arm_palettes):
+            ax_robot = self.axes[f'robot_{name}']
+            label = self.simulation.method(name).label
+            ax_robot.set_title(f'Robot Arm - {label} Method', fontsize=14, fontweight='bold', pad=15)
+            ax_robot.set_xlim(*arm_xlim)
+            ax_robot.set_ylim(*arm_ylim)
+            ax_robot.set_aspect('equal')
+            ax_robot.grid(True, alpha=0.3)
+            ax_robot.tick_params(labelsize=10)
+            
+            self._add_arm_links(ax_robot, f'robot_{name}', palette)
+            # 관절 포인트 추가
+            self.lines[f'robot_{name}_joints'], = ax_robot.plot([], [], 'ko', markersize=8, label='Joints')
+            ax_robot.legend(fontsize=10, loc='upper left', framealpha=0.9)  # 위치 변경
         
         # 로봇 팔 오버레이 비교
         ax_robot_overlay = self.axes['robot_overlay']
         ax_robot_overlay.set_title('Robot Arm Overlay Comparison', fontsize=14, fontweight='bold', pad=15)
-        ax_robot_overlay.set_xlim(-3.2, 4.2)
-        ax_robot_overlay.set_ylim(-2.2, 2.2)
+        ax_robot_overlay.set_xlim(*arm_xlim)
+        ax_robot_overlay.set_ylim(*arm_ylim)
         ax_robot_overlay.set_aspect('equal')
         ax_robot_overlay.grid(True, alpha=0.3)
         ax_robot_overlay.tick_params(labelsize=10)
         
-        # 스플라인 (투명하게)
-        self.lines['overlay_spline_upper'], = ax_robot_overlay.plot([0, 0], [0, 0], 'g-', linewidth=4, alpha=0.7, label='Spline Method')
-        self.lines['overlay_spline_forearm'], = ax_robot_overlay.plot([0, 0], [0, 0], 'g-', linewidth=4, alpha=0.7)
-        self.lines['overlay_spline_hand'], = ax_robot_overlay.plot([0, 0], [0, 0], 'g-', linewidth=3, alpha=0.7)
-        
-        # 직접 매핑 (점선으로)
-        self.lines['overlay_direct_upper'], = ax_robot_overlay.plot([0, 0], [0, 0], 'r--', linewidth=4, alpha=0.7, label='Direct Method')
-        self.lines['overlay_direct_forearm'], = ax_robot_overlay.plot([0, 0], [0, 0], 'r--', linewidth=4, alpha=0.7)
-        self.lines['overlay_direct_hand'], = ax_robot_overlay.plot([0, 0], [0, 0], 'r--', linewidth=3, alpha=0.7)
+        # 방법별 색상/선 스타일로 겹쳐 표시 (투명하게)
+        for method in self.methods:
+            self._add_overlay_links(ax_robot_overlay, f'overlay_{method.name}', method, f'{method.label} Method')
         
         ax_robot_overlay.legend(fontsize=10, loc='upper left', framealpha=0.9)  # 위치 변경
         
         # 엔드 이펙터 궤적 비교
         ax_trajectory = self.axes['trajectory']
         ax_trajectory.set_title('End-Effector Trajectory Comparison', fontsize=14, fontweight='bold', pad=15)
-        ax_trajectory.set_xlim(-0, 7)
-        ax_trajectory.set_ylim(-2.2, 2.2)
         ax_trajectory.set_aspect('equal')
         ax_trajectory.grid(True, alpha=0.3)
         ax_trajectory.tick_params(labelsize=10)
         
+        # 끝점 도달 가능 영역 (정적 배경) 및 이에 맞춘 축 범위
+        workspace = self.workspace
+        x_min, y_min = workspace.origin
+        x_max, y_max = workspace.origin + workspace.resolution * np.array(workspace.shape)
+        ax_trajectory.imshow(workspace.occupancy.T, origin='lower', extent=(x_min, x_max, y_min, y_max),
+                             cmap='Greys', vmin=0, vmax=4, interpolation='nearest', zorder=0)
+        trajectory_xlim, trajectory_ylim = workspace.bounds(margin=0.3)
+        ax_trajectory.set_xlim(*trajectory_xlim)
+        ax_trajectory.set_ylim(*trajectory_ylim)
+        
         # 궤적 라인 초기화 (최근 N개 포인트의 궤적 표시)
-        self.lines['trajectory_spline'], = ax_trajectory.plot([], [], 'g-', linewidth=2, alpha=0.8, label='Spline Trajectory')
-        self.lines['trajectory_direct'], = ax_trajectory.plot([], [], 'r--', linewidth=2, alpha=0.8, label='Direct Trajectory')
-        self.lines['trajectory_spline_current'], = ax_trajectory.plot([], [], 'go', markersize=8, label='Spline Current')
-        self.lines['trajectory_direct_current'], = ax_trajectory.plot([], [], 'ro', markersize=8, label='Direct Current')
+        for method in self.methods:
+            self.lines[f'trajectory_{method.name}'], = ax_trajectory.plot(
+                [], [], color=method.color, linestyle=method.linestyle, linewidth=2, alpha=0.8,
+                label=f'{method.label} Trajectory')
+            self.lines[f'trajectory_{method.name}_current'], = ax_trajectory.plot(
+                [], [], 'o', color=method.color, markersize=8, label=f'{method.label} Current')
         
-        ax_trajectory.legend(fontsize=10, loc='upper right', framealpha=0.9)
+        ax_trajectory.legend(fontsize=9, loc='lower left', framealpha=0.9)  # 도달 영역 밖 (기저 왼쪽 아래)
         
         # 궤적 데이터 저장용 deque 초기화
-        self.trajectory_data = {
-            'spline_x': deque(maxlen=100),
-            'spline_y': deque(maxlen=100),
-            'direct_x': deque(maxlen=100),
-            'direct_y': deque(maxlen=100)
-        }
+        self.trajectory_data = {}
+        for method in self.methods:
+            self.trajectory_data[f'{method.name}_x'] = deque(maxlen=100)
+            self.trajectory_data[f'{method.name}_y'] = deque(maxlen=100)
         
         # 부드러움 비교 (저크)
         ax_smooth = self.axes['smoothness']
@@ -188,24 +212,61 @@ class SimulationVisualizer:
         ax_smooth.grid(True, alpha=0.3)
         ax_smooth.tick_params(labelsize=10)
         
-        self.bars['jerk_spline'] = ax_smooth.bar(x_pos - width/2, [0, 0, 0], width, 
-                                               label='Spline', color='green', alpha=0.7)
-        self.bars['jerk_direct'] = ax_smooth.bar(x_pos + width/2, [0, 0, 0], width, 
-                                               label='Direct', color='red', alpha=0.7)
+        self._add_method_bars(ax_smooth, 'jerk', x_pos)
         ax_smooth.set_xticks(x_pos)
         ax_smooth.set_xticklabels(self.joint_names)
         ax_smooth.legend(fontsize=11, framealpha=0.9)
         
+    def _add_method_bars(self, ax, prefix, x_pos):
+        """방법별 막대 그래프 생성 (관절마다 방법 수만큼 나란히 배치)"""
+        width = 0.7 / len(self.methods)
+        for m, method in enumerate(self.methods):
+            offset = (m - (len(self.methods) - 1) / 2) * width
+            self.bars[f'{prefix}_{method.name}'] = ax.bar(x_pos + offset, np.zeros(len(self.joint_keys)), width,
+                                                         label=method.label, color=method.color, alpha=0.7)
+    
+    def _add_arm_links(self, ax, prefix, styles):
+        """로봇 팔 링크 라인 생성 (링크별 색상)"""
+        for i, name in enumerate(self.link_names):
+            # 마지막 링크(손)는 얇게 표시
+            linewidth = 4 if i == len(self.link_names) - 1 else 6
+            self.lines[f'{prefix}_link{i}'], = ax.plot([0, 0], [0, 0], styles[i % len(styles)],
+                                                       linewidth=linewidth, label=name)
+    
+    def _add_overlay_links(self, ax, prefix, method, label):
+        """오버레이 차트용 로봇 팔 링크 라인 생성 (방법별 단일 색상)"""
+        for i in range(len(self.link_names)):
+            linewidth = 3 if i == len(self.link_names) - 1 else 4
+            self.lines[f'{prefix}_link{i}'], = ax.plot([0, 0], [0, 0], color=method.color,
+                                                       linestyle=method.linestyle, linewidth=linewidth,
+                                                       alpha=0.7, label=label if i == 0 else None)
+    
+    def _set_arm_lines(self, prefix, points):
+        """링크 라인을 관절 위치 목록에 맞게 갱신"""
+        for i in range(len(self.link_names)):
+            self.lines[f'{prefix}_link{i}'].set_data([points[i][0], points[i + 1][0]],
+                                                     [points[i][1], points[i + 1][1]])
+        
     def setup_controls(self):
         """컨트롤 패널 설정"""
-        # 노이즈 레벨 슬라이더 - 더 아래쪽으로 이동
-        ax_noise = plt.axes([0.08, 0.06, 0.25, 0.03])
-        self.widgets['noise_slider'] = Slider(ax_noise, 'Noise Level', 0.0, 0.2, 
-                                             valinit=0.05, valfmt='%.3f')
-        
-        # 시작/정지 버튼 - 더 아래쪽으로 이동
-        ax_button = plt.axes([0.38, 0.06, 0.12, 0.04])
-        self.widgets['start_button'] = Button(ax_button, 'Start/Stop')
+        if self.interactive:
+            # 노이즈 레벨 슬라이더 - 더 아래쪽으로 이동
+            ax_noise = plt.axes([0.08, 0.06, 0.25, 0.03])
+            self.widgets['noise_slider'] = Slider(ax_noise, 'Noise Level', 0.0, 0.2, 
+                                                 valinit=0.05, valfmt='%.3f')
+            
+            # 시작/정지 버튼 - 더 아래쪽으로 이동
+            ax_button = plt.axes([0.38, 0.06, 0.12, 0.04])
+            self.widgets['start_button'] = Button(ax_button, 'Start/Stop')
+            
+            # 장기 이력 보기 전환 버튼
+            ax_history = plt.axes([0.38, 0.01, 0.12, 0.04])
+            self.widgets['history_button'] = Button(ax_history, 'Long History')
+            
+            # 이벤트 핸들러 연결
+            self.widgets['noise_slider'].on_changed(self.update_noise)
+            self.widgets['start_button'].on_clicked(self.toggle_simulation)
+            self.widgets['history_button'].on_clicked(self.toggle_history)
         
         # 성능 지표 텍스트 상자 - 더 아래쪽으로 이동
         ax_text = plt.axes([0.55, 0.02, 0.42, 0.09])
@@ -222,10 +283,6 @@ class SimulationVisualizer:
                                            verticalalignment='center',
                                            bbox=bbox_props)
         
-        # 이벤트 핸들러 연결
-        self.widgets['noise_slider'].on_changed(self.update_noise)
-        self.widgets['start_button'].on_clicked(self.toggle_simulation)
-        
     def update_noise(self, val):
         """노이즈 레벨 업데이트"""
         self.simulation.sensor.noise_level = val
@@ -234,20 +291,34 @@ class SimulationVisualizer:
         """시뮬레이션 시작/정지"""
         self.simulation.is_running = not self.simulation.is_running
         
+    def toggle_history(self, event):
+        """최근 윈도우 / 장기 이력 보기 전환"""
+        self.long_history = not self.long_history
+        
+    def record_history(self, simulation):
+        """틱 콜백: 최신 샘플을 장기 이력 인덱스에 추가"""
+        self.history.append(simulation.time_window.last(),
+                            np.concatenate((simulation.human_data.last(), simulation.robot_data.last().ravel())))
+        
     def update_joint_plots(self):
         """관절별 플롯 업데이트"""
+        if self.long_history:
+            self.update_history_plots()
+            return
         if len(self.simulation.time_window) <= 1:
             return
             
-        t_data = list(self.simulation.time_window)
-        joint_axes = [self.axes['joint1'], self.axes['joint2'], self.axes['joint3']]
+        t_data = self.simulation.time_window.view()
+        human_data = self.simulation.human_data.view()
+        robot_data = self.simulation.robot_data.view()  # (시간, 방법, 관절)
+        joint_axes = [self.axes[f'joint{i + 1}'] for i in range(len(self.joint_keys))]
         
-        # 개별 관절 차트 업데이트
+        # 개별 관절 차트 업데이트 (matplotlib이 데이터를 보관하므로 복사본 전달)
         for i, key in enumerate(self.joint_keys):
-            if len(self.simulation.human_data[key]) > 0:
-                self.lines[f'human_{key}'].set_data(t_data, list(self.simulation.human_data[key]))
-                self.lines[f'robot_spline_{key}'].set_data(t_data, list(self.simulation.robot_data_spline[key]))
-                self.lines[f'robot_direct_{key}'].set_data(t_data, list(self.simulation.robot_data_direct[key]))
+            if len(human_data) > 0:
+                self.lines[f'human_{key}'].set_data(t_data.copy(), human_data[:, i].copy())
+                for m, method in enumerate(self.methods):
+                    self.lines[f'robot_{method.name}_{key}'].set_data(t_data.copy(), robot_data[:, m, i].copy())
             
             # 축 범위 설정 개선
             if len(t_data) > 0:
@@ -259,146 +330,148 @@ class SimulationVisualizer:
                     joint_axes[i].set_xlim(0, 10)
                 else:
                     # 10초 이후부터는 슬라이딩 윈도우
+                    if self.stable_limits:
+                        current_time = np.floor(current_time)
                     joint_axes[i].set_xlim(current_time - 10, current_time + 1)
                 
                 # Y축 범위를 데이터에 맞게 조정
-                if len(self.simulation.human_data[key]) > 0:
-                    all_data = (list(self.simulation.human_data[key]) + 
-                               list(self.simulation.robot_data_spline[key]) + 
-                               list(self.simulation.robot_data_direct[key]))
-                    if all_data:
-                        y_min, y_max = min(all_data), max(all_data)
-                        y_range = max(y_max - y_min, 10)  # 최소 범위 보장
-                        y_center = (y_max + y_min) / 2
-                        joint_axes[i].set_ylim(y_center - y_range*0.6, y_center + y_range*0.6)
+                if len(human_data) > 0:
+                    self._set_joint_ylim(joint_axes[i], np.concatenate((human_data[:, i], robot_data[:, :, i].ravel())))
             else:
                 # 초기 상태: 기본 범위 설정
                 joint_axes[i].set_xlim(0, 10)
                 joint_axes[i].set_ylim(-100, 100)
+    
+    def update_history_plots(self):
+        """장기 이력 관절 플롯 업데이트 (축 픽셀 폭에 맞춰 최소/최대 축약)"""
+        if len(self.history) <= 1:
+            return
+        
+        t_end = self.history.times[len(self.history) - 1]
+        x_end = np.floor(t_end) if self.stable_limits else t_end
+        t_start = max(0.0, x_end - self.history_seconds)
+        n_joints = len(self.joint_keys)
+        
+        for i, key in enumerate(self.joint_keys):
+            ax = self.axes[f'joint{i + 1}']
+            # 축 폭의 픽셀 열 수만큼만 점을 생성 (열당 최대 4점)
+            times, values = self.history.query(t_start, t_end, ax.bbox.width)
+            # 채널 배치: [인간 관절..., 방법0 관절..., 방법1 관절..., ...]
+            channels = [i] + [n_joints * (m + 1) + i for m in range(len(self.methods))]
+            self.lines[f'human_{key}'].set_data(times[channels[0]], values[channels[0]])
+            for method, channel in zip(self.methods, channels[1:]):
+                self.lines[f'robot_{method.name}_{key}'].set_data(times[channel], values[channel])
+            
+            ax.set_xlim(t_start, max(x_end + 1, t_start + 10))
+            self._set_joint_ylim(ax, values[channels].ravel())
+    
+    def _set_joint_ylim(self, ax, data):
+        """관절 차트 Y축 범위를 데이터에 맞게 조정"""
+        if len(data) == 0:
+            return
+        y_min, y_max = data.min(), data.max()
+        y_range = max(y_max - y_min, 10)  # 최소 범위 보장
+        y_center = (y_max + y_min) / 2
+        y_low, y_high = y_center - y_range*0.6, y_center + y_range*0.6
+        if self.stable_limits:
+            # 20도 단위로 바깥쪽 반올림 (이전 프레임과 무관하게 결정되도록)
+            y_low, y_high = np.floor(y_low / 20) * 20, np.ceil(y_high / 20) * 20
+        ax.set_ylim(y_low, y_high)
                         
     def update_robot_visualization(self):
         """로봇 팔 시각화 업데이트"""
-        # 스플라인 방법 로봇 팔
-        positions_spline = self.simulation.get_robot_arm_position('spline')
-        if positions_spline is not None:
-            shoulder = positions_spline['shoulder']
-            elbow = positions_spline['elbow']
-            wrist = positions_spline['wrist']
-            end = positions_spline['end']
-            
-            # 스플라인 방법 개별 차트
-            self.lines['robot_spline_upper'].set_data([shoulder[0], elbow[0]], [shoulder[1], elbow[1]])
-            self.lines['robot_spline_forearm'].set_data([elbow[0], wrist[0]], [elbow[1], wrist[1]])
-            self.lines['robot_spline_hand'].set_data([wrist[0], end[0]], [wrist[1], end[1]])
-            self.lines['robot_spline_joints'].set_data([shoulder[0], elbow[0], wrist[0], end[0]], 
-                                                      [shoulder[1], elbow[1], wrist[1], end[1]])
-            
-            # 오버레이 차트 - 스플라인
-            self.lines['overlay_spline_upper'].set_data([shoulder[0], elbow[0]], [shoulder[1], elbow[1]])
-            self.lines['overlay_spline_forearm'].set_data([elbow[0], wrist[0]], [elbow[1], wrist[1]])
-            self.lines['overlay_spline_hand'].set_data([wrist[0], end[0]], [wrist[1], end[1]])
-            
-            # 궤적 데이터 저장
-            self.trajectory_data['spline_x'].append(end[0])
-            self.trajectory_data['spline_y'].append(end[1])
-        
-        # 직접 매핑 방법 로봇 팔
-        positions_direct = self.simulation.get_robot_arm_position('direct')
-        if positions_direct is not None:
-            shoulder = positions_direct['shoulder']
-            elbow = positions_direct['elbow']
-            wrist = positions_direct['wrist']
-            end = positions_direct['end']
+        for method in self.methods:
+            name = method.name
+            positions = self.simulation.get_robot_arm_position(name)
+            if positions is None:
+                continue
+            points = list(positions.values())
+            end = points[-1]
             
-            # 직접 매핑 방법 개별 차트
-            self.lines['robot_direct_upper'].set_data([shoulder[0], elbow[0]], [shoulder[1], elbow[1]])
-            self.lines['robot_direct_forearm'].set_data([elbow[0], wrist[0]], [elbow[1], wrist[1]])
-            self.lines['robot_direct_hand'].set_data([wrist[0], end[0]], [wrist[1], end[1]])
-            self.lines['robot_direct_joints'].set_data([shoulder[0], elbow[0], wrist[0], end[0]], 
-                                                      [shoulder[1], elbow[1], wrist[1], end[1]])
+            # 방법별 개별 차트
+            if name in self.arm_methods:
+                self._set_arm_lines(f'robot_{name}', points)
+                self.lines[f'robot_{name}_joints'].set_data([p[0] for p in points], [p[1] for p in points])
             
-            # 오버레이 차트 - 직접 매핑
-            self.lines['overlay_direct_upper'].set_data([shoulder[0], elbow[0]], [shoulder[1], elbow[1]])
-            self.lines['overlay_direct_forearm'].set_data([elbow[0], wrist[0]], [elbow[1], wrist[1]])
-            self.lines['overlay_direct_hand'].set_data([wrist[0], end[0]], [wrist[1], end[1]])
+            # 오버레이 차트
+            self._set_arm_lines(f'overlay_{name}', points)
             
             # 궤적 데이터 저장
-            self.trajectory_data['direct_x'].append(end[0])
-            self.trajectory_data['direct_y'].append(end[1])
+            self.trajectory_data[f'{name}_x'].append(end[0])
+            self.trajectory_data[f'{name}_y'].append(end[1])
         
         # 엔드 이펙터 궤적 업데이트
-        if len(self.trajectory_data['spline_x']) > 1:
-            self.lines['trajectory_spline'].set_data(list(self.trajectory_data['spline_x']), 
-                                                   list(self.trajectory_data['spline_y']))
-            # 현재 위치 표시
-            self.lines['trajectory_spline_current'].set_data([self.trajectory_data['spline_x'][-1]], 
-                                                           [self.trajectory_data['spline_y'][-1]])
-        
-        if len(self.trajectory_data['direct_x']) > 1:
-            self.lines['trajectory_direct'].set_data(list(self.trajectory_data['direct_x']), 
-                                                    list(self.trajectory_data['direct_y']))
-            # 현재 위치 표시
-            self.lines['trajectory_direct_current'].set_data([self.trajectory_data['direct_x'][-1]], 
-                                                           [self.trajectory_data['direct_y'][-1]])
+        for method in self.methods:
+            name = method.name
+            if len(self.trajectory_data[f'{name}_x']) > 1:
+                self.lines[f'trajectory_{name}'].set_data(list(self.trajectory_data[f'{name}_x']), 
+                                                          list(self.trajectory_data[f'{name}_y']))
+                # 현재 위치 표시
+                self.lines[f'trajectory_{name}_current'].set_data([self.trajectory_data[f'{name}_x'][-1]], 
+                                                                  [self.trajectory_data[f'{name}_y'][-1]])
         
     def update_performance_metrics(self):
         """성능 지표 업데이트"""
         metrics = self.simulation.get_performance_metrics()
-        if not metrics or 'spline' not in metrics or 'direct' not in metrics:
+        if not metrics:
             return
-            
-        rmse_spline = []
-        rmse_direct = []
-        jerk_spline = []
-        jerk_direct = []
-        
-        for i, joint in enumerate(self.joint_keys):
-            if joint in metrics['spline']:
-                rmse_spline.append(metrics['spline'][joint]['rmse'])
-                jerk_spline.append(metrics['spline'][joint]['jerk'])
-                self.bars['performance_spline'][i].set_height(metrics['spline'][joint]['rmse'])
-                self.bars['jerk_spline'][i].set_height(metrics['spline'][joint]['jerk'])
-            else:
-                rmse_spline.append(0)
-                jerk_spline.append(0)
-                self.bars['performance_spline'][i].set_height(0)
-                self.bars['jerk_spline'][i].set_height(0)
-            
-            if joint in metrics['direct']:
-                rmse_direct.append(metrics['direct'][joint]['rmse'])
-                jerk_direct.append(metrics['direct'][joint]['jerk'])
-                self.bars['performance_direct'][i].set_height(metrics['direct'][joint]['rmse'])
-                self.bars['jerk_direct'][i].set_height(metrics['direct'][joint]['jerk'])
-            else:
-                rmse_direct.append(0)
-                jerk_direct.append(0)
-                self.bars['performance_direct'][i].set_height(0)
-                self.bars['jerk_direct'][i].set_height(0)
         
-        # 축 범위 조정
-        if rmse_spline or rmse_direct:
-            max_rmse = max(max(rmse_spline + rmse_direct), 1)
-            self.axes['performance'].set_ylim(0, max_rmse * 1.2)
+        # 아직 유효 샘플이 없는 지표는 NaN: 막대는 0, 평균/개선율에서는 제외
+        rmse = {}
+        jerk = {}
+        for method in self.methods:
+            name = method.name
+            rmse[name] = []
+            jerk[name] = []
+            for i, joint in enumerate(self.joint_keys):
+                joint_metrics = metrics.get(name, {}).get(joint)
+                rmse[name].append(joint_metrics['rmse'] if joint_metrics else np.nan)
+                jerk[name].append(joint_metrics['jerk'] if joint_metrics else np.nan)
+                self.bars[f'performance_{name}'][i].set_height(np.nan_to_num(rmse[name][-1]))
+                self.bars[f'jerk_{name}'][i].set_height(np.nan_to_num(jerk[name][-1]))
         
-        if jerk_spline or jerk_direct:
-            max_jerk = max(max(jerk_spline + jerk_direct), 1)
-            self.axes['smoothness'].set_ylim(0, max_jerk * 1.2)
+        # 축 범위 조정
+        max_rmse = max([value for values in rmse.values() for value in values if np.isfinite(value)] + [1])
+        self.axes['performance'].set_ylim(0, self._bar_limit(max_rmse * 1.2))
+        max_jerk = max([value for values in jerk.values() for value in values if np.isfinite(value)] + [1])
+        self.axes['smoothness'].set_ylim(0, self._bar_limit(max_jerk * 1.2))
         
         # 성능 텍스트 업데이트
-        avg_rmse_spline = np.mean(rmse_spline) if rmse_spline else 0
-        avg_rmse_direct = np.mean(rmse_direct) if rmse_direct else 0
-        avg_jerk_spline = np.mean(jerk_spline) if jerk_spline else 0
-        avg_jerk_direct = np.mean(jerk_direct) if jerk_direct else 0
-        
-        improvement_rmse = ((avg_rmse_direct - avg_rmse_spline) / max(avg_rmse_direct, 0.001)) * 100
-        improvement_jerk = ((avg_jerk_direct - avg_jerk_spline) / max(avg_jerk_direct, 0.001)) * 100
-        
-        self.performance_text.set_text(
-            f"🎯 Performance Comparison:\n"
-            f"📊 RMSE - Spline: {avg_rmse_spline:.2f}°, Direct: {avg_rmse_direct:.2f}°\n"
-            f"📈 Jerk - Spline: {avg_jerk_spline:.2f}, Direct: {avg_jerk_direct:.2f}\n"
-            f"⬆️ Improvement - RMSE: {improvement_rmse:.1f}%, Jerk: {improvement_jerk:.1f}%"
-        )
+        avg_rmse = {name: self._finite_mean(values) for name, values in rmse.items()}
+        avg_jerk = {name: self._finite_mean(values) for name, values in jerk.items()}
+        
+        def format_value(value, unit=''):
+            return f"{value:.2f}{unit}" if np.isfinite(value) else "n/a"
+        
+        text = "🎯 Performance Comparison:\n"
+        text += "📊 RMSE - " + ", ".join(f"{m.label}: {format_value(avg_rmse[m.name], '°')}"
+                                         for m in self.methods) + "\n"
+        text += "📈 Jerk - " + ", ".join(f"{m.label}: {format_value(avg_jerk[m.name])}" for m in self.methods)
+        
+        # 직접 매핑 대비 개선율 (직접 매핑이 비교 대상에 있고 양쪽 지표가 모두 있을 때)
+        def measured(name):
+            return np.isfinite(avg_rmse[name]) and np.isfinite(avg_jerk[name])
+        
+        if 'direct' in avg_rmse and measured('direct'):
+            improvements = []
+            for method in self.methods:
+                if method.name == 'direct' or not measured(method.name):
+                    continue
+                improvement_rmse = ((avg_rmse['direct'] - avg_rmse[method.name]) /
+                                    max(avg_rmse['direct'], 0.001)) * 100
+                improvement_jerk = ((avg_jerk['direct'] - avg_jerk[method.name]) /
+                                    max(avg_jerk['direct'], 0.001)) * 100
+                improvements.append(f"{method.label} RMSE {improvement_rmse:.1f}%, Jerk {improvement_jerk:.1f}%")
+            if improvements:
+                text += "\n⬆️ Improvement - " + "; ".join(improvements)
+        
+        self.performance_text.set_text(text)
+    
+    @staticmethod
+    def _finite_mean(values):
+        """NaN을 제외한 평균 (값이 하나도 없으면 NaN)"""
+        finite = [value for value in values if np.isfinite(value)]
+        return np.mean(finite) if finite else np.nan
     
     def animate(self, frame):
         """애니메이션 업데이트 함수"""
@@ -411,12 +484,76 @@ class SimulationVisualizer:
         self.update_performance_metrics()
         
         # 모든 그래픽 요소 반환 (애니메이션용)
-        return (list(self.lines.values()) + 
-                list(self.bars['performance_spline']) + 
-                list(self.bars['performance_direct']) +
-                list(self.bars['jerk_spline']) + 
-                list(self.bars['jerk_direct']) +
-                [self.performance_text])
+        bars = [bar for container in self.bars.values() for bar in container]
+        return list(self.lines.values()) + bars + [self.performance_text]
+    
+    def update_all(self):
+        """시뮬레이션 진행 없이 모든 플롯 갱신"""
+        self.update_joint_plots()
+        self.update_robot_visualization()
+        self.update_performance_metrics()
+    
+    def _bar_limit(self, value):
+        """막대 그래프 상한 (안정 모드에서는 1-2-5 단계로 올림)"""
+        if not self.stable_limits:
+            return value
+        magnitude = 10 ** np.floor(np.log10(value))
+        for step in (1, 2, 5, 10):
+            if value <= step * magnitude:
+                return step * magnitude
+        return value
+    
+    def _dynamic_artists(self):
+        """매 프레임 바뀌는 그래픽 요소"""
+        bars = [bar for container in self.bars.values() for bar in container]
+        return list(self.lines.values()) + bars + [self.performance_text]
+    
+    def render_rgb(self):
+        """현재 그림을 RGB 배열 (높이, 너비, 3)로 렌더링 (Agg 캔버스 필요)
+        
+        캐시된 정적 배경 (축, 눈금, 범례) 위에 변하는 요소만 다시 그린다. 축 범위가
+        바뀐 축은 그 축 영역만 지우고 다시 그려 배경을 갱신한다 (그림 전체는 첫 프레임만).
+        """
+        canvas = self.fig.canvas
+        dynamic = self._dynamic_artists()
+        state = {name: (ax.get_xlim(), ax.get_ylim()) for name, ax in self.axes.items()}
+        
+        if self._background is None:
+            # 정적 요소만 그린 뒤 배경으로 저장
+            for artist in dynamic:
+                artist.set_animated(True)
+            canvas.draw()
+            renderer = canvas.get_renderer()
+            self._static_boxes = {name: ax.get_tightbbox(renderer) for name, ax in self.axes.items()}
+            self._background = canvas.copy_from_bbox(self.fig.bbox)
+            self._background_state = state
+        else:
+            canvas.restore_region(self._background)
+            changed = [name for name in state if state[name] != self._background_state[name]]
+            if changed:
+                renderer = canvas.get_renderer()
+                for name in changed:
+                    ax = self.axes[name]
+                    # 이전/새 눈금 라벨 영역을 모두 지운 뒤 축 정적 요소만 다시 그림 (축 영역은 서로 겹치지 않음)
+                    box = self._static_boxes[name]
+                    self._static_boxes[name] = ax.get_tightbbox(renderer)
+                    self._clear_region(Bbox.union([box, self._static_boxes[name]]))
+                    self.fig.draw_artist(ax)
+                self._background = canvas.copy_from_bbox(self.fig.bbox)
+                self._background_state = state
+        
+        for artist in dynamic:
+            self.fig.draw_artist(artist)
+        return np.array(canvas.buffer_rgba())[..., :3]
+    
+    def _clear_region(self, box):
+        """그림 배경색으로 픽셀 영역 채우기 (정수 픽셀 경계로 확장)"""
+        x0, y0 = np.floor(box.x0) - 1, np.floor(box.y0) - 1
+        x1, y1 = np.ceil(box.x1) + 1, np.ceil(box.y1) + 1
+        patch = Rectangle((x0, y0), x1 - x0, y1 - y0, transform=None, facecolor=self.fig.get_facecolor(),
+                          edgecolor='none', antialiased=False)
+        patch.set_figure(self.fig)
+        self.fig.draw_artist(patch)
     
     def start_animation(self):
         """애니메이션 시작"""
@@ -442,4 +579,143 @@ class SimulationVisualizer:
 def create_visualization(simulation):
     """시각화 생성 함수"""
     visualizer = SimulationVisualizer(simulation)
-    return visualizer.start_animation()
\ No newline at end of file
+    return visualizer.start_animation()
+
+# ---------------------------------------------------------------------------
+# 오프스크린 프레임 내보내기 (Agg 백엔드, 병렬 작업 프로세스)
+# ---------------------------------------------------------------------------
+
+def render_frames(recording, frames, dpi=50, trail_length=100):
+    """녹화 세션의 지정 프레임들을 Agg 백엔드로 렌더링하는 RGB 배열 생성기
+    
+    recording: SimulationRecorder (녹화 또는 헤드리스 실행 결과)
+    frames: 렌더링할 샘플 인덱스 (range 권장)
+    
+    비용: dpi=50에서 코어 하나당 약 0.08-0.09 s/프레임 (대부분 성능 텍스트 글리프 래스터화)으로
+    dt=0.05 s 녹화를 실시간 속도로 내보내려면 약 2 코어가 필요하다 (export_frames/export_video 병렬 작업).
+    """
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from recording import ReplaySimulation
+    
+    simulation = ReplaySimulation(recording)
+    visualizer = SimulationVisualizer(simulation, interactive=False)
+    FigureCanvasAgg(visualizer.fig)
+    visualizer.fig.set_dpi(dpi)
+    
+    frames = list(frames)
+    if frames:
+        # 첫 프레임 이전 구간으로 엔드 이펙터 궤적 꼬리 채우기
+        step = frames[1] - frames[0] if len(frames) > 1 else 1
+        for index in range(max(0, frames[0] - trail_length * step), frames[0], step):
+            simulation.seek(index)
+            visualizer.update_robot_visualization()
+    
+    try:
+        for index in frames:
+            simulation.seek(index)
+            visualizer.update_all()
+            yield visualizer.render_rgb()
+    finally:
+        plt.close(visualizer.fig)
+
+def _init_export_worker():
+    """내보내기 작업 프로세스 초기화 (GUI 없는 Agg 백엔드 사용)"""
+    plt.switch_backend('Agg')
+
+def _frame_chunks(recording, start, stop, step, chunk_size, trail_length):
+    """프레임 범위를 작업 단위로 분할 (작업마다 필요한 녹화 구간만 잘라서 전달)"""
+    stop = len(recording) if stop is None else min(stop, len(recording))
+    frames = range(start, stop, step)
+    # 시간 창과 궤적 꼬리 워밍업에 필요한 과거 샘플 수
+    history = max(recording.window_size, trail_length * step + 1)
+    
+    chunks = []
+    for i in range(0, len(frames), chunk_size):
+        chunk = frames[i:i + chunk_size]
+        offset = max(0, chunk[0] - history)
+        chunks.append((i, recording.slice(offset, chunk[-1] + 1),
+                       range(chunk.start - offset, chunk.stop - offset, step)))
+    return chunks
+
+def _write_image_chunk(args):
+    """작업 프로세스: 프레임 구간을 PNG 이미지로 저장"""
+    first_number, recording, frames, output_dir, dpi, trail_length = args
+    for number, rgb in enumerate(render_frames(recording, frames, dpi, trail_length), first_number):
+        plt.imsave(os.path.join(output_dir, f'frame_{number:06d}.png'), rgb)
+    return len(frames)
+
+def _encode_video_chunk(args):
+    """작업 프로세스: 프레임 구간을 ffmpeg로 인코딩하여 영상 조각 생성"""
+    recording, frames, segment_path, fps, dpi, trail_length, codec_args = args
+    encoder = None
+    try:
+        for rgb in render_frames(recording, frames, dpi, trail_length):
+            if encoder is None:
+                height, width = rgb.shape[:2]
+                encoder = subprocess.Popen(
+                    ['ffmpeg', '-y', '-loglevel', 'error',
+                     '-f', 'rawvideo', '-pix_fmt', 'rgb24', '-s', f'{width}x{height}',
+                     '-r', str(fps), '-i', '-'] + codec_args + [segment_path],
+                    stdin=subprocess.PIPE
+                )
+            # 원시 RGB 버퍼를 인코더로 직접 전달
+            encoder.stdin.write(np.ascontiguousarray(rgb).tobytes())
+    finally:
+        if encoder is not None:
+            encoder.stdin.close()
+            if encoder.wait() != 0:
+                raise RuntimeError(f"ffmpeg failed while encoding {segment_path}")
+    return segment_path
+
+def _run_export_tasks(function, tasks, workers):
+    """작업 프로세스 풀에서 내보내기 작업 실행 (순서 유지)"""
+    if workers == 1:
+        return [function(task) for task in tasks]
+    
+    # spawn: 부모 프로세스의 GUI 백엔드 상태를 물려받지 않음
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context,
+                             initializer=_init_export_worker) as executor:
+        return list(executor.map(function, tasks))
+
+def export_frames(recording, output_dir, start=0, stop=None, step=1, dpi=50,
+                  workers=None, chunk_size=200, trail_length=100):
+    """녹화 세션을 PNG 이미지 시퀀스 (frame_000000.png, ...)로 병렬 내보내기"""
+    os.makedirs(output_dir, exist_ok=True)
+    workers = workers or os.cpu_count() or 1
+    
+    tasks = [(number, chunk_recording, frames, output_dir, dpi, trail_length)
+             for number, chunk_recording, frames in
+             _frame_chunks(recording, start, stop, step, chunk_size, trail_length)]
+    return sum(_run_export_tasks(_write_image_chunk, tasks, workers))
+
+def export_video(recording, filename, fps=None, start=0, stop=None, step=1, dpi=50,
+                 workers=None, chunk_size=500, trail_length=100,
+                 codec_args=('-c:v', 'libx264', '-preset', 'fast', '-pix_fmt', 'yuv420p')):
+    """녹화 세션을 영상 파일로 병렬 내보내기
+    
+    작업 프로세스마다 프레임 구간을 렌더링하여 각자 ffmpeg로 인코딩한 뒤,
+    재인코딩 없이 조각들을 이어 붙인다. fps 미지정 시 실시간 속도 (1 / (dt * step)).
+    """
+    if shutil.which('ffmpeg') is None:
+        raise RuntimeError("ffmpeg not found. Install ffmpeg or use export_frames() instead.")
+    
+    fps = fps or 1.0 / (recording.dt * step)
+    workers = workers or os.cpu_count() or 1
+    
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        tasks = [(chunk_recording, frames, os.path.join(tmp_dir, f'segment_{number:08d}.mp4'),
+                  fps, dpi, trail_length, list(codec_args))
+                 for number, chunk_recording, frames in
+                 _frame_chunks(recording, start, stop, step, chunk_size, trail_length)]
+        segments = _run_export_tasks(_encode_video_chunk, tasks, workers)
+        
+        # 조각 목록 파일 작성 후 스트림 복사로 이어 붙이기
+        list_path = os.path.join(tmp_dir, 'segments.txt')
+        with open(list_path, 'w') as f:
+            for segment in segments:
+                f.write(f"file '{segment}'\n")
+        subprocess.run(['ffmpeg', '-y', '-loglevel', 'error', '-f', 'concat', '-safe', '0',
+                        '-i', list_path, '-c', 'copy', filename], check=True)
+    
+    return len(range(start, len(recording) if stop is None else min(stop, len(recording)), step))
@@ -0,0 +1,199 @@
+"""
+Robot Workspace Precomputation
+관절 한계 영역 전체의 순기구학 스윕으로 도달 가능 영역 격자와 최근접 자세 인덱스를 만드는 모듈
+"""
+
+import hashlib
+import json
+import os
+
+import numpy as np
+from scipy import ndimage
+from scipy.spatial import cKDTree
+
+# 기본 캐시 디렉터리 (로봇 기하 파라미터별 파일 하나)
+CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'robot_workspace')
+# 캐시 형식 버전 (저장 내용이 바뀌면 증가)
+CACHE_VERSION = 1
+
+def default_resolution(model):
+    """기본 격자 크기: 최대 도달 거리의 1/100"""
+    return model.reach / 100
+
+def cache_key(model, resolution=None):
+    """작업 공간을 결정하는 파라미터 (관절 한계, 링크 길이, 격자 크기)의 해시"""
+    resolution = default_resolution(model) if resolution is None else resolution
+    key = {
+        'version': CACHE_VERSION,
+        'joint_limits': np.stack([model.lower_limits, model.upper_limits], axis=1).tolist(),
+        'link_lengths': model.link_lengths.tolist(),
+        'resolution': float(resolution)
+    }
+    return hashlib.sha1(json.dumps(key, sort_keys=True).encode()).hexdigest()[:16]
+
+class RobotWorkspace:
+    """끝점 도달 가능 영역 격자 + 격자 칸별 대표 자세 KD-트리
+
+    관절 한계 상자를 격자 크기보다 촘촘한 각도 간격으로 스윕해 끝점이 지나는
+    칸을 표시하고, 칸마다 처음 도달한 자세를 대표로 저장한다. 도달 가능 여부는
+    칸 조회 한 번, 최근접 자세는 대표 끝점의 KD-트리 조회로 계산한다.
+    """
+
+    def __init__(self, model, resolution=None, max_configurations=2_000_000, chunk_size=200_000):
+        self.model = model
+        self.resolution = float(default_resolution(model) if resolution is None else resolution)
+        self._sweep(max_configurations, chunk_size)
+        self._build_tree()
+
+    def _sweep_steps(self, max_configurations):
+        """관절별 샘플 수: 끝점 이동 간격이 격자 크기 이하가 되도록 (총 개수 상한 적용)"""
+        spans = np.radians(self.model.upper_limits - self.model.lower_limits)
+        # 관절 j 회전 시 끝점까지의 최대 반경
+        levers = np.cumsum(self.model.link_lengths[::-1])[::-1]
+        steps = np.ceil(spans * levers / self.resolution).astype(np.int64) + 1
+        total = np.prod(steps.astype(float))
+        if total > max_configurations:
+            # 모든 관절을 같은 비율로 줄임 (격자 구멍은 닫힘 연산으로 보정)
+            steps = np.maximum(np.floor(steps * (max_configurations / total) ** (1 / len(steps))), 2)
+        return steps.astype(np.int64)
+
+    def _sweep(self, max_configurations, chunk_size):
+        """관절 한계 상자 순기구학 스윕 (청크 단위 벡터화)"""
+        model = self.model
+        # 격자 범위: 최대 도달 거리 + 한 칸 여유
+        extent = model.reach + self.resolution
+        self.origin = np.array([-extent, -extent])
+        n_cells = int(np.ceil(2 * extent / self.resolution)) + 1
+        self.shape = (n_cells, n_cells)
+
+        steps = self._sweep_steps(max_configurations)
+        axes = [np.linspace(lo, hi, n) for lo, hi, n in zip(model.lower_limits, model.upper_limits, steps)]
+        total = int(np.prod(steps))
+
+        first_config = np.full((n_cells * n_cells, model.n_joints), np.nan)
+        first_point = np.zeros((n_cells * n_cells, 2))
+        filled = np.zeros(n_cells * n_cells, dtype=bool)
+        link_min = np.full(2, np.inf)
+        link_max = np.full(2, -np.inf)
+
+        for start in range(0, total, chunk_size):
+            index = np.unravel_index(np.arange(start, min(start + chunk_size, total)), steps)
+            configurations = np.stack([axis[i] for axis, i in zip(axes, index)], axis=-1)
+            points = model.forward_kinematics(configurations)
+            # 팔 전체 (모든 관절 위치) 범위: 로봇 팔 차트 축 범위용
+            link_min = np.minimum(link_min, points.min(axis=(0, 1)))
+            link_max = np.maximum(link_max, points.max(axis=(0, 1)))
+
+            end = points[:, -1]
+            cells, _ = self.cell_indices(end)
+            # 칸별로 처음 도달한 자세만 대표로 저장
+            unique, first = np.unique(cells, return_index=True)
+            new = ~filled[unique]
+            first_config[unique[new]] = configurations[first[new]]
+            first_point[unique[new]] = end[first[new]]
+            filled[unique[new]] = True
+
+        # 샘플 사이 한 칸 틈을 메움 (대표 자세는 실제로 도달한 칸에만 존재)
+        self.occupancy = ndimage.binary_closing(filled.reshape(self.shape)) | filled.reshape(self.shape)
+        self.cells = np.flatnonzero(filled)
+        self.configurations = first_config[self.cells]
+        self.points = first_point[self.cells]
+        self.link_bounds = np.concatenate([link_min, link_max])
+        self.n_samples = total
+
+    def _build_tree(self):
+        """대표 끝점 KD-트리 생성"""
+        self.tree = cKDTree(self.points)
+
+    def cell_indices(self, points):
+        """위치 (..., 2) -> 평탄화한 격자 칸 인덱스 (...,)와 격자 내부 여부"""
+        grid = np.floor((np.asarray(points, dtype=float) - self.origin) / self.resolution).astype(np.int64)
+        inside = np.all((grid >= 0) & (grid < self.shape), axis=-1)
+        grid = np.clip(grid, 0, np.array(self.shape) - 1)
+        return grid[..., 0] * self.shape[1] + grid[..., 1], inside
+
+    def is_reachable(self, points):
+        """끝점 목표 (..., 2)의 도달 가능 여부 (...,) - 격자 조회 O(1)"""
+        cells, inside = self.cell_indices(points)
+        return inside & self.occupancy.reshape(-1)[cells]
+
+    def nearest_configuration(self, points):
+        """끝점 목표 (..., 2)에 가장 가까운 대표 자세 (..., J)와 대표 끝점까지 거리 (...,)"""
+        points = np.asarray(points, dtype=float)
+        distance, index = self.tree.query(points.reshape(-1, 2))
+        shape = points.shape[:-1]
+        return self.configurations[index].reshape(shape + (-1,)), distance.reshape(shape)
+
+    @property
+    def area(self):
+        """도달 가능 영역 넓이 (격자 근사)"""
+        return float(self.occupancy.sum()) * self.resolution**2
+
+    def bounds(self, margin=0.1, links=False):
+        """차트 축 범위 ((x_min, x_max), (y_min, y_max))
+
+        links=False: 끝점 도달 영역, True: 팔 전체 (기저 및 모든 관절 위치 포함)
+        """
+        if links:
+            low, high = self.link_bounds[:2], self.link_bounds[2:]
+        else:
+            ix, iy = np.nonzero(self.occupancy)
+            low = self.origin + self.resolution * np.array([ix.min(), iy.min()])
+            high = self.origin + self.resolution * (np.array([ix.max(), iy.max()]) + 1)
+        return (low[0] - margin, high[0] + margin), (low[1] - margin, high[1] + margin)
+
+    def save(self, filename):
+        """작업 공간 인덱스를 npz 파일로 저장 (KD-트리는 불러올 때 재생성)"""
+        np.savez(
+            filename,
+            resolution=self.resolution,
+            origin=self.origin,
+            occupancy=self.occupancy,
+            cells=self.cells,
+            configurations=self.configurations,
+            points=self.points,
+            link_bounds=self.link_bounds,
+            n_samples=self.n_samples
+        )
+
+    @classmethod
+    def load(cls, filename, model):
+        """npz 파일에서 작업 공간 인덱스 불러오기"""
+        data = np.load(filename)
+        workspace = cls.__new__(cls)
+        workspace.model = model
+        workspace.resolution = float(data['resolution'])
+        workspace.origin = data['origin']
+        workspace.occupancy = data['occupancy']
+        workspace.shape = workspace.occupancy.shape
+        workspace.cells = data['cells']
+        workspace.configurations = data['configurations']
+        workspace.points = data['points']
+        workspace.link_bounds = data['link_bounds']
+        workspace.n_samples = int(data['n_samples'])
+        workspace._build_tree()
+        return workspace
+
+    @classmethod
+    def load_or_compute(cls, model, resolution=None, cache_dir=CACHE_DIR, **kwargs):
+        """캐시된 작업 공간을 불러오거나 계산 후 캐시에 저장 (cache_dir=None이면 캐시 미사용)"""
+        if cache_dir is None:
+            return cls(model, resolution, **kwargs)
+
+        filename = os.path.join(cache_dir, f'workspace_{cache_key(model, resolution)}.npz')
+        if os.path.exists(filename):
+            try:
+                return cls.load(filename, model)
+            except (OSError, ValueError, KeyError):
+                pass  # 손상된 캐시는 다시 계산
+
+        workspace = cls(model, resolution, **kwargs)
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            # 여러 프로세스가 동시에 써도 완성된 파일만 보이도록 임시 파일 후 교체
+            temporary = f'{filename[:-len(".npz")]}.{os.getpid()}.tmp.npz'
+            workspace.save(temporary)
+            os.replace(temporary, filename)
+        except OSError:
+            pass  # 쓰기 불가 환경에서는 캐시 없이 사용
+        return workspace